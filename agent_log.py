@@ -0,0 +1,93 @@
+import atexit
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from batch_queue import BatchQueue
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+
+class AgentLog:
+    """
+    Structured, buffered agent log. event() only enqueues a record; a background thread serializes
+    records as JSON lines ({"ts", "level", "event", "message", ...fields}) and writes them in batches of up to
+    batch_size, at least every flush_interval seconds. When the file exceeds max_bytes it is rotated to
+    path.1 ... path.<backup_count>, gzip-compressed if compress is set.
+    Records below `level` are dropped before they are queued; callers check enabled_for() before building
+    expensive fields such as full prompts.
+    """
+    def __init__(self, path='output.log', level='INFO', max_bytes=10 * 1024 * 1024, backup_count=5, compress=False,
+                 batch_size=256, flush_interval=0.5):
+        self.path = path
+        self.level = LEVELS[level.upper()]
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = BatchQueue()
+        self.file = open(path, 'a', encoding='utf-8')
+        self.thread = threading.Thread(target=self._run, name='agent-log', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def enabled_for(self, level):
+        return LEVELS[level] >= self.level
+
+    def event(self, event, message='', level='INFO', **fields):
+        if LEVELS[level] < self.level:
+            return
+        record = {'ts': time.time(), 'level': level, 'event': event, 'message': message}
+        record.update(fields)
+        self.queue.put(record)
+
+    def _run(self):
+        while True:
+            records, stop = self.queue.next_batch(self.batch_size, timeout=self.flush_interval)
+            if records:
+                try:
+                    self.file.write(''.join(json.dumps(r, default=str) + '\n' for r in records))
+                    self.file.flush()
+                    if self.max_bytes and self.file.tell() >= self.max_bytes:
+                        self._rotate()
+                except Exception as e:
+                    print(f"[WARN] Log write failed: {e}")
+            for _ in records:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _backup_name(self, n):
+        return f"{self.path}.{n}" + ('.gz' if self.compress else '')
+
+    def _rotate(self):
+        self.file.close()
+        if self.backup_count > 0:
+            oldest = self._backup_name(self.backup_count)
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for n in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(self._backup_name(n)):
+                    os.replace(self._backup_name(n), self._backup_name(n + 1))
+            if self.compress:
+                with open(self.path, 'rb') as src, gzip.open(self._backup_name(1), 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self._backup_name(1))
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        self.queue.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.close()
+            self.thread.join()
+            self.file.close()
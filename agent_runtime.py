@@ -0,0 +1,163 @@
+import os
+import uuid
+import yaml
+from llm import LLM
+from llm_cache import ResponseCache
+from prefix_cache import PrefixCache
+from llm_batcher import BatchingLLM
+from vector_store import VectorStore
+from embedding_cache import EmbeddingCache
+from embedding_worker import EmbeddingWorker
+from lazy_loader import BackgroundLoader
+from tool_executor import ToolExecutor
+import http_client
+from task_manager import TaskManager
+from agent_log import AgentLog
+from prompt_builder import PromptBuilder
+from metrics import registry as metrics
+
+
+def load_config(path='config.yaml'):
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def vector_store_arguments(vector_cfg):
+    """VectorStore positional and keyword arguments for the vector_store config section, with its embedding cache."""
+    provider = vector_cfg.get('provider', 'local')
+    embedding_model_name = vector_cfg.get('embedding_model', 'all-MiniLM-L6-v2')
+    cache_cfg = vector_cfg.get('embedding_cache') or {}
+    embedding_cache = EmbeddingCache(namespace=embedding_model_name, max_entries=cache_cfg.get('max_entries', 10000),
+                                     path=cache_cfg.get('path'))
+    return (provider, vector_cfg.get('index', 'babyagi-tasks')), dict(
+        api_key=os.getenv('PINECONE_API_KEY'), embedding_model_name=embedding_model_name,
+        index_options=vector_cfg.get(provider) or {}, embedding_cache=embedding_cache,
+        embed_batch_size=vector_cfg.get('embed_batch_size', 32))
+
+
+class AgentRuntime:
+    """
+    The shared pieces of an agent, built from config.yaml: LLM and vector store (both loading in the background),
+    caches, embedding worker, tool executor, log and prompt builder. make_task_manager() builds TaskManagers
+    over them; several can run at once, and make_objective_manager() keeps each one's memory apart.
+    With batching, concurrent LLM calls go through a BatchingLLM.
+    A vector_store given by the caller (e.g. a proxy to a cluster's shared store) is used instead of building one.
+    """
+    def __init__(self, config, batching=False, vector_store=None):
+        self.config = config
+        self.batching = batching
+
+        # Vector store setup (loads in the background)
+        vector_cfg = config['vector_store']
+        self.loaders = {}
+        if vector_store is not None:
+            self.embedding_cache = None  # lives with the store
+            self.vector_store = vector_store
+        else:
+            args, kwargs = vector_store_arguments(vector_cfg)
+            self.embedding_cache = kwargs['embedding_cache']
+            self.vector_store = BackgroundLoader('vector store', VectorStore, *args, **kwargs)
+            self.loaders['vector store'] = self.vector_store
+
+        # LLM setup (loads in the background, in parallel with the vector store)
+        llm_cfg = config['llm']
+        self.llm_cache = None
+        llm_cache_cfg = llm_cfg.get('cache') or {}
+        if llm_cache_cfg.get('enabled', False):
+            self.llm_cache = ResponseCache(path=llm_cache_cfg.get('path', 'llm_cache.sqlite'),
+                                           max_entries=llm_cache_cfg.get('max_entries', 5000),
+                                           ttl_seconds=llm_cache_cfg.get('ttl_seconds'),
+                                           semantic=llm_cache_cfg.get('semantic', False),
+                                           semantic_threshold=llm_cache_cfg.get('semantic_threshold', 0.95),
+                                           embed=lambda text: self.vector_store.embed_text(text))
+        self.prefix_cache = None
+        prefix_cfg = llm_cfg.get('prefix_cache') or {}
+        if prefix_cfg.get('enabled', False):
+            self.prefix_cache = PrefixCache(max_bytes=int(prefix_cfg.get('max_mb', 256) * 1024 * 1024),
+                                            max_prefixes=prefix_cfg.get('max_prefixes', 64))
+        self.llm_loader = BackgroundLoader('llm', LLM, os.getenv('LLM_MODEL_PATH', llm_cfg['model']),
+                                           max_tokens=llm_cfg.get('max_tokens', 512), cache=self.llm_cache,
+                                           prefix_cache=self.prefix_cache, backend=llm_cfg.get('backend', 'fp32'),
+                                           compile=llm_cfg.get('compile', False), num_threads=llm_cfg.get('threads'),
+                                           interop_threads=llm_cfg.get('interop_threads'),
+                                           cpu_affinity=llm_cfg.get('cpu_affinity'))
+        self.loaders['llm'] = self.llm_loader
+        self.llm = self.llm_loader
+        if batching:
+            batch_cfg = llm_cfg.get('batch') or {}
+            self.llm = BatchingLLM(self.llm_loader, max_batch_size=batch_cfg.get('max_batch_size', 8),
+                                   max_wait=batch_cfg.get('max_wait', 0.02))
+
+        self.embedding_worker = EmbeddingWorker(self.vector_store, batch_size=vector_cfg.get('embed_batch_size', 32))
+
+        # Tool execution
+        http_client.configure(**(config.get('http') or {}))
+        tools_cfg = config.get('tools') or {}
+        self.tool_executor = ToolExecutor(timeout=tools_cfg.get('timeout', 30), timeouts=tools_cfg.get('timeouts'),
+                                          max_concurrency=tools_cfg.get('max_concurrency', 8),
+                                          per_tool_concurrency=tools_cfg.get('per_tool_concurrency', 4),
+                                          io_workers=tools_cfg.get('io_workers', 8),
+                                          cpu_workers=tools_cfg.get('cpu_workers', 2),
+                                          memo_size=tools_cfg.get('memo_size', 1024))
+
+        # Structured logging
+        log_cfg = config.get('logging') or {}
+        self.logger = AgentLog(log_cfg.get('file', 'output.log'), level=log_cfg.get('level', 'INFO'),
+                               max_bytes=log_cfg.get('max_bytes', 10 * 1024 * 1024),
+                               backup_count=log_cfg.get('backup_count', 5), compress=log_cfg.get('compress', False))
+
+        # Task managers
+        tm_cfg = config['task_manager']
+        self.results_file = tm_cfg.get('results_file', 'results.jsonl')
+        self.max_executions = tm_cfg.get('max_executions', 50)
+        prompt_cfg = tm_cfg.get('prompt') or {}
+        self.prompt_builder = PromptBuilder(self.llm, context_tokens=prompt_cfg.get('context_tokens', 1024),
+                                            max_result_tokens=prompt_cfg.get('max_result_tokens', 256),
+                                            compress=prompt_cfg.get('compress', 'truncate'))
+        self.task_manager_options = dict(
+            max_tasks=tm_cfg.get('max_tasks', 10), embedding_worker=self.embedding_worker,
+            context_top_k=tm_cfg.get('context_top_k', 5), tool_executor=self.tool_executor,
+            results_file=self.results_file, journal_options=tm_cfg.get('journal'), logger=self.logger,
+            prioritization=tm_cfg.get('prioritization', 'relevance'), scheduler_options=tm_cfg.get('scheduler'),
+            prompt_builder=self.prompt_builder)
+        metrics.add_collector(self.collect_metrics)
+
+    def make_task_manager(self, **overrides):
+        options = dict(self.task_manager_options, **overrides)
+        return TaskManager(self.llm, self.vector_store, **options)
+
+    def make_objective_manager(self):
+        """
+        TaskManager for one of several objectives run side by side (--batch, cluster workers, the web UI): results
+        are kept in memory, nothing is echoed, and its results go to a namespace of their own in the vector store.
+        """
+        return self.make_task_manager(results_file=None, stream_output=False, namespace=uuid.uuid4().hex)
+
+    def cache_stats(self):
+        stats = {}
+        if self.llm_cache is not None:
+            stats['LLM cache'] = self.llm_cache.stats()
+        if self.prefix_cache is not None:
+            stats['Prefix cache'] = self.prefix_cache.stats()
+        return stats
+
+    def collect_metrics(self):
+        caches = {'llm': self.llm_cache, 'prefix': self.prefix_cache, 'embedding': self.embedding_cache}
+        stats = {name: cache.stats() for name, cache in caches.items() if cache is not None}
+        http_stats = http_client.shared_stats()
+        if http_stats is not None:
+            stats['http'] = http_stats
+        stats['tool_memo'] = self.tool_executor.memo_stats()
+        gauges = [(f'cache_{key}', {'cache': name}, s[key]) for name, s in stats.items()
+                  for key in ('hits', 'misses', 'hit_rate')]
+        gauges.append(('embedding_queue_depth', {}, self.embedding_worker.queue.qsize()))
+        if self.batching:
+            gauges.append(('llm_queue_depth', {}, self.llm.queue.qsize()))
+        return gauges
+
+    def close(self):
+        if self.batching:
+            self.llm.close()
+        self.embedding_worker.close()
+        self.tool_executor.shutdown()
+        self.logger.close()
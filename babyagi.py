@@ -1,42 +1,150 @@
+import time
+_import_start = time.perf_counter()
 import argparse
-import os
-import yaml
+import json
 from dotenv import load_dotenv
-from llm import LLM
-from vector_store import VectorStore
-from task_manager import TaskManager
+from lazy_loader import record_time
+from agent_runtime import AgentRuntime, load_config
+from batch_runner import BatchRunner, read_objectives
+from checkpoint import Checkpoint
+from cluster import Coordinator
+from metrics import registry as metrics
+_import_seconds = time.perf_counter() - _import_start
+
+
+def print_startup_profile(timings, loaders, started):
+    print("[PROFILE] Startup time breakdown (seconds):")
+    for name, seconds in timings.items():
+        print(f"  {name:<44} {seconds:8.3f}")
+    for name, loader in loaders.items():
+        for stage, seconds in loader.result().load_times.items():
+            print(f"  {name + ': ' + stage:<44} {seconds:8.3f}")
+        print(f"  {name + ' total (background)':<44} {loader.seconds:8.3f}")
+    print(f"  {'wall clock until ready':<44} {time.perf_counter() - started:8.3f}")
+
+
+def write_metrics(path):
+    text = json.dumps(metrics.snapshot(), indent=2, sort_keys=True)
+    if path == '-':
+        print(text)
+        return
+    with open(path, 'w') as f:
+        f.write(text + '\n')
+    print(f"[INFO] Metrics written to {path}")
+
+
+def run_cluster(config, args):
+    cluster_cfg = config.get('cluster') or {}
+    coordinator = Coordinator(config, processes=args.cluster, output_path=args.output, workers=args.workers,
+                              dag=args.dag, heartbeat_interval=cluster_cfg.get('heartbeat_interval', 5.0),
+                              heartbeat_timeout=cluster_cfg.get('heartbeat_timeout', 60.0),
+                              max_restarts=cluster_cfg.get('max_restarts', 10),
+                              max_attempts=cluster_cfg.get('max_attempts', 2),
+                              pin_cores=cluster_cfg.get('pin_cores', True))
+    print(f"[INFO] Running objectives from {args.batch} on {args.cluster} worker processes; results go to {args.output}")
+    try:
+        print(f"[INFO] Cluster summary: {coordinator.run(read_objectives(args.batch))}")
+    finally:
+        coordinator.close()
 
 
 def main():
+    started = time.perf_counter()
+    timings = {'import babyagi modules': _import_seconds}
     load_dotenv()
     parser = argparse.ArgumentParser(description="BabyAGI: Exploring Artificial General Intelligence")
-    parser.add_argument('--objective', type=str, required=True, help='Objective for the agent')
+    parser.add_argument('--objective', type=str, help='Objective for the agent (prompted for if omitted)')
+    parser.add_argument('--non-interactive', action='store_true',
+                        help='Execute tasks without prompting, several at a time with batched LLM calls')
+    parser.add_argument('--dag', action='store_true',
+                        help='Non-interactive DAG mode: run tasks by dependency, independent ones in parallel')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent tasks in --non-interactive and --dag mode')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Headless mode: run objectives from a JSONL file ('-' for stdin) concurrently")
+    parser.add_argument('--output', default='batch_results.jsonl',
+                        help='--batch results (JSONL); objectives already done there are skipped')
+    parser.add_argument('--concurrency', type=int, default=4, help='Objectives run at once in --batch mode')
+    parser.add_argument('--cluster', type=int, metavar='N',
+                        help='Run --batch objectives in N worker processes sharing one vector store process')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the run saved in the checkpoint (queue, objective, DAG) instead of starting over')
+    parser.add_argument('--profile-startup', action='store_true', help='Print an import/load time breakdown')
+    parser.add_argument('--metrics-json', metavar='FILE',
+                        help="Write per-stage timings, tool, token and cache metrics as JSON at exit ('-' for stdout)")
     args = parser.parse_args()
+    if args.cluster and not args.batch:
+        parser.error('--cluster requires --batch')
+    if args.dag or args.batch:
+        args.non_interactive = True
 
     # Load config
-    with open('config.yaml', 'r') as f:
-        config = yaml.safe_load(f)
-
-    # LLM setup
-    llm_model_path = os.getenv('LLM_MODEL_PATH', config['llm']['model'])
-    llm_max_tokens = config['llm'].get('max_tokens', 512)
-    llm = LLM(llm_model_path, max_tokens=llm_max_tokens)
-
-    # Vector store setup
-    vector_cfg = config['vector_store']
-    provider = vector_cfg.get('provider', 'local')
-    index = vector_cfg.get('index', 'babyagi-tasks')
-    pinecone_api_key = os.getenv('PINECONE_API_KEY')
-    embedding_model_name = vector_cfg.get('embedding_model', 'all-MiniLM-L6-v2')
-    vector_store = VectorStore(provider, index, api_key=pinecone_api_key, embedding_model_name=embedding_model_name)
-
-    # Task manager
-    max_tasks = config['task_manager'].get('max_tasks', 10)
-    task_manager = TaskManager(llm, vector_store, max_tasks=max_tasks)
+    with record_time(timings, 'parse config'):
+        config = load_config()
+
+    if args.cluster:
+        # The coordinator loads no models; every worker process builds its own runtime
+        run_cluster(config, args)
+        return
+
+    # Models and vector store load in the background from here on
+    runtime = AgentRuntime(config, batching=args.non_interactive)
+
+    checkpoint_cfg = config['task_manager'].get('checkpoint') or {}
+    checkpoint = Checkpoint(checkpoint_cfg.get('path', 'checkpoint.json'),
+                            min_interval=checkpoint_cfg.get('min_interval', 1.0))
+    resume_state = checkpoint.load() if args.resume and not args.batch else None
+    if args.resume and not args.batch and resume_state is None:
+        print(f"[WARN] No checkpoint at {checkpoint.path}; starting a new run.")
+
+    # Models keep loading while the user types the objective
+    if args.batch:
+        objective = None
+    elif resume_state is not None and resume_state.get('objective'):
+        objective = resume_state['objective']
+    else:
+        objective = args.objective or input("Enter objective: ").strip()
+
+    max_executions = runtime.max_executions
+
+    def run_objective(task_manager, objective, resume=False):
+        if args.dag:
+            task_manager.run_graph(objective, max_parallel=args.workers, max_executions=max_executions, resume=resume)
+        elif args.non_interactive:
+            task_manager.run_concurrent(objective, workers=args.workers, max_executions=max_executions, resume=resume)
+        else:
+            task_manager.run_loop(objective, resume=resume)
+
+    if args.profile_startup:
+        print_startup_profile(timings, runtime.loaders, started)
 
     # Run loop
-    print(f"[INFO] Starting BabyAGI with objective: {args.objective}")
-    task_manager.run_loop(args.objective)
+    task_manager = None
+    try:
+        if args.batch:
+            # Objectives share the models, vector store and tools; each keeps its results in memory and in --output
+            runner = BatchRunner(runtime.make_objective_manager, run_objective,
+                                 output_path=args.output, concurrency=args.concurrency, llm=runtime.llm)
+            print(f"[INFO] Running objectives from {args.batch}; results go to {args.output}")
+            try:
+                print(f"[INFO] Batch summary: {runner.run(read_objectives(args.batch))}")
+            finally:
+                runner.close()
+        else:
+            task_manager = runtime.make_task_manager(checkpoint=checkpoint, stream_output=not args.non_interactive)
+            if resume_state is not None:
+                task_manager.restore(resume_state)
+                print(f"[INFO] Resuming BabyAGI with objective: {objective} ({len(task_manager.tasks)} tasks queued)")
+            else:
+                print(f"[INFO] Starting BabyAGI with objective: {objective}")
+            run_objective(task_manager, objective, resume=resume_state is not None)
+    finally:
+        if task_manager is not None:
+            task_manager.save_checkpoint(force=True)  # also on Ctrl-C, so --resume can pick the run up
+        runtime.close()
+        for name, stats in runtime.cache_stats().items():
+            print(f"[INFO] {name}: {stats}")
+        if args.metrics_json:
+            write_metrics(args.metrics_json)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
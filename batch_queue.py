@@ -0,0 +1,38 @@
+import queue
+import time
+
+_CLOSE = object()
+
+
+class BatchQueue(queue.Queue):
+    """
+    Queue read by one background thread in micro-batches: next_batch() waits for an item, then keeps taking
+    items until max_size are in hand or max_wait seconds have passed. close() queues a marker behind the items
+    already submitted, so the consumer sees every one of them before it is told to stop.
+    Consumers that support join() call task_done() once per item; the close marker is marked done here.
+    """
+    def next_batch(self, max_size, max_wait=0.0, timeout=None):
+        """
+        Return (items, closed). Blocks for the first item, or up to timeout seconds (returning ([], False) if none
+        arrived), then collects more items for up to max_wait seconds. closed is True once the close marker is taken.
+        """
+        try:
+            first = self.get(timeout=timeout)
+        except queue.Empty:
+            return [], False
+        batch = [first]
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_size and batch[-1] is not _CLOSE:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.get(timeout=remaining) if remaining > 0 else self.get_nowait())
+            except queue.Empty:
+                break
+        closed = batch[-1] is _CLOSE
+        if closed:
+            batch.pop()
+            self.task_done()
+        return batch, closed
+
+    def close(self):
+        self.put(_CLOSE)
@@ -0,0 +1,161 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def read_objectives(source):
+    """
+    Yield (id, objective) pairs from a JSONL file, or stdin when source is '-'. A line is a JSON object with an
+    'objective' (or 'title' and 'body', as in requests.jsonl) and optionally an 'id' / 'request_id'; any other
+    non-empty line is taken as the objective itself. Lines without an id are numbered.
+    """
+    f = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = line
+            if not isinstance(item, dict):
+                yield str(number), str(item)
+                continue
+            objective = item.get('objective') or '\n'.join(p for p in (item.get('title'), item.get('body')) if p)
+            yield str(item.get('id') or item.get('request_id') or number), objective
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def run_objective_record(make_manager, run_objective, objective_id, objective):
+    """Run one objective on a fresh TaskManager and return its result record (status, results, timing)."""
+    started = time.perf_counter()
+    manager = None
+    record = {'id': objective_id, 'objective': objective}
+    try:
+        manager = make_manager()
+        run_objective(manager, objective)
+        record['status'] = 'done'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    completed = list(manager.completed) if manager is not None else []
+    record['executed'] = len(completed)
+    record['results'] = completed
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+class BatchOutput:
+    """
+    JSONL file of objective result records, one per line, each fsynced as it is written. done_ids holds the
+    objectives already recorded as done, which a rerun skips; a torn last line left by a crash is ended first.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done_ids = self.completed_ids()
+        self.output = open(path, 'a', encoding='utf-8')
+        if self.output.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self.output.write('\n')  # end a torn line so the next record starts on its own
+
+    def completed_ids(self):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crash; that objective is run again
+                if record.get('status') == 'done':
+                    done.add(record['id'])
+        return done
+
+    def write(self, record):
+        with self.lock:
+            self.output.write(json.dumps(record) + '\n')
+            self.output.flush()
+            os.fsync(self.output.fileno())
+
+    def close(self):
+        with self.lock:
+            self.output.close()
+
+
+class BatchRunner:
+    """
+    Headless runner for many objectives over shared LLM, vector store and tool instances.
+    - Every objective gets its own TaskManager from make_manager(), so tasks and memory are not shared.
+    - At most `concurrency` objectives run at once, and the input is only read as slots free up, so a large file
+      or a stdin pipe is streamed with bounded memory.
+    - Each finished objective is appended to output_path as one JSON line and fsynced. Objectives already
+      recorded as done there are skipped, so a crashed or interrupted run resumes where it stopped.
+    run_objective(manager, objective) runs one objective (e.g. TaskManager.run_concurrent or run_graph).
+    """
+    def __init__(self, make_manager, run_objective, output_path='batch_results.jsonl', concurrency=4, llm=None):
+        self.make_manager = make_manager
+        self.run_objective = run_objective
+        self.output_path = output_path
+        self.concurrency = concurrency
+        self.llm = llm  # for token throughput, if it has token_usage()
+        self.output = BatchOutput(output_path)
+        self.done_ids = self.output.done_ids
+
+    def _run_one(self, objective_id, objective):
+        record = run_objective_record(self.make_manager, self.run_objective, objective_id, objective)
+        self.output.write(record)
+        return record['status']
+
+    def _token_usage(self):
+        usage = getattr(self.llm, 'token_usage', None)
+        return usage() if usage is not None else None
+
+    def run(self, objectives):
+        """Run (id, objective) pairs and return a throughput summary."""
+        started = time.perf_counter()
+        tokens_before = self._token_usage()
+        counts = {'done': 0, 'error': 0, 'skipped': 0}
+        seen = set()
+        objectives = iter(objectives)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='objective') as pool:
+            in_flight = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < self.concurrency:
+                    item = next(objectives, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    objective_id, objective = item
+                    if objective_id in self.done_ids or objective_id in seen or not objective:
+                        counts['skipped'] += 1
+                        continue
+                    seen.add(objective_id)
+                    in_flight.add(pool.submit(self._run_one, objective_id, objective))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    counts[future.result()] += 1
+        elapsed = time.perf_counter() - started
+        summary = dict(counts, seconds=round(elapsed, 3),
+                       objectives_per_hour=round((counts['done'] + counts['error']) * 3600 / elapsed, 2) if elapsed else 0.0)
+        tokens_after = self._token_usage()
+        if tokens_before is not None and tokens_after is not None:
+            generated = tokens_after['completion_tokens'] - tokens_before['completion_tokens']
+            summary['completion_tokens'] = generated
+            summary['tokens_per_sec'] = round(generated / elapsed, 2) if elapsed else 0.0
+        return summary
+
+    def close(self):
+        self.output.close()
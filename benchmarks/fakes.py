@@ -0,0 +1,99 @@
+import threading
+import time
+import zlib
+import numpy as np
+from task_manager import FEEDBACK_HEADER
+
+
+def _seed(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+class FakeEmbedder:
+    """
+    Deterministic stand-in for a SentenceTransformer: every text maps to the same pseudo-random vector on every run.
+    Each encode() call sleeps latency seconds plus per_text_latency for each text, like a batched encoder.
+    """
+    def __init__(self, dim=64, latency=0.0, per_text_latency=0.0):
+        self.dim = dim
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+        self.encoded = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def vector(self, text):
+        return np.random.default_rng(_seed(text)).standard_normal(self.dim).astype(np.float32)
+
+    def encode(self, texts, batch_size=32):
+        texts = list(texts)
+        delay = self.latency + self.per_text_latency * len(texts)
+        if delay:
+            time.sleep(delay)
+        self.calls += 1
+        self.encoded += len(texts)
+        return np.vstack([self.vector(t) for t in texts]) if texts else np.empty((0, self.dim), dtype=np.float32)
+
+
+class FakeLLM:
+    """
+    Deterministic stand-in for llm.LLM that recognizes the TaskManager's prompts:
+    - task generation ("Objective: ...") returns `tasks` numbered tasks;
+    - task execution returns a short result, with a 'TOOL: sha256_hasher: ...' directive for every tool_every-th task;
+    - feedback suggests one follow-up task for every follow_up_every-th task, else 'No further action needed.'
+    Every call sleeps latency seconds plus per_token_latency for each whitespace-separated output token; a
+    generate_batch() call pays the latency once and the per-token cost of its longest output, like a padded batch.
+    """
+    def __init__(self, tasks=5, tool_every=3, follow_up_every=4, latency=0.0, per_token_latency=0.0):
+        self.tasks = tasks
+        self.tool_every = tool_every
+        self.follow_up_every = follow_up_every
+        self.latency = latency
+        self.per_token_latency = per_token_latency
+        self.usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'generations': 0}
+        self.usage_lock = threading.Lock()
+        self.objectives = 0
+
+    def respond(self, prompt):
+        if prompt.startswith(FEEDBACK_HEADER):
+            task = prompt[len(FEEDBACK_HEADER):].split('\n', 1)[0][len('Task: '):]
+            if self.follow_up_every and _seed(task) % self.follow_up_every == 0:
+                return f"Follow up on: {task[:60]}"
+            return "No further action needed."
+        if prompt.startswith('Objective:'):
+            with self.usage_lock:
+                self.objectives += 1
+                run = self.objectives
+            return '\n'.join(f"{n}. Task {n} of run {run}" for n in range(1, self.tasks + 1))
+        if 'Execute the following task:' in prompt:
+            task = prompt.rsplit('Execute the following task:', 1)[1].strip()
+            result = f"Completed '{task}' with a short summary of the findings."
+            if self.tool_every and _seed(task) % self.tool_every == 0:
+                result = f"TOOL: sha256_hasher: {task}\n" + result
+            return result
+        return "Summary: " + ' '.join(prompt.split()[:20])
+
+    def _record(self, prompt, completion):
+        completion_tokens = len(completion.split())
+        with self.usage_lock:
+            self.usage['prompt_tokens'] += len(prompt.split())
+            self.usage['completion_tokens'] += completion_tokens
+            self.usage['generations'] += 1
+        return completion_tokens
+
+    def token_usage(self):
+        with self.usage_lock:
+            return dict(self.usage)
+
+    def generate(self, prompt):
+        return self.generate_batch([prompt])[0]
+
+    def generate_batch(self, prompts):
+        results = [self.respond(p) for p in prompts]
+        tokens = max(self._record(p, r) for p, r in zip(prompts, results)) if results else 0
+        delay = self.latency + self.per_token_latency * tokens
+        if delay:
+            time.sleep(delay)
+        return results
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+from benchmarks.scenarios import SCENARIOS
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def scenario_runs(names, quick=False):
+    """[(result key, scenario name, kwargs)] for the selected scenarios; quick keeps only each scenario's first size."""
+    runs = []
+    for name in names:
+        function, grid, _ = SCENARIOS[name]
+        if not grid:
+            runs.append((name, name, {}))
+        for parameter, values in grid.items():
+            for value in values[:1] if quick else values:
+                runs.append((f'{name}[{parameter}={value}]', name, {parameter: value}))
+    return runs
+
+
+def run(names, quick=False, repeat=1, options=None):
+    """Run the scenarios; with repeat > 1 each metric is the median over the repeats (the first run's shares)."""
+    results = {}
+    for key, name, kwargs in scenario_runs(names, quick):
+        function, _, primary = SCENARIOS[name]
+        if name == 'task_loop':
+            kwargs = dict(kwargs, **(options or {}))
+        print(f"[BENCH] {key} ...", file=sys.stderr, flush=True)
+        samples = [function(**kwargs) for _ in range(repeat)]
+        result = dict(samples[0])
+        for metric, value in samples[0].items():
+            if isinstance(value, (int, float)):
+                median = float(np.median([s[metric] for s in samples]))
+                result[metric] = int(median) if isinstance(value, int) and median.is_integer() else median
+        result['primary'] = primary
+        results[key] = result
+        print(f"[BENCH] {key}: {primary} = {result[primary]}", file=sys.stderr, flush=True)
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance, min_delta=0.0):
+    """
+    Compare each result's primary metric (lower is better, in milliseconds) with the baseline. A regression is a
+    slowdown beyond tolerance (relative) and min_delta (absolute, so sub-millisecond noise does not count).
+    Returns [(key, metric, baseline value, current value)]; results missing from either side are skipped.
+    """
+    regressions = []
+    for key, result in report['results'].items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            print(f"[BENCH] {key}: no baseline", file=sys.stderr)
+            continue
+        metric = result['primary']
+        old, new = previous.get(metric), result.get(metric)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        regressed = new > old * (1 + tolerance) and new - old > min_delta
+        print(f"[BENCH] {key}: {metric} {old} -> {new} ({change:+.1%}){'  REGRESSION' if regressed else ''}",
+              file=sys.stderr)
+        if regressed:
+            regressions.append((key, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline BabyAGI benchmarks with a deterministic stub LLM and encoder")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable; default: all)')
+    parser.add_argument('--quick', action='store_true', help='Only the smallest size of each scenario')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per scenario; metrics are medians')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Seconds per stub LLM call in task_loop')
+    parser.add_argument('--embed-latency', type=float, default=0.0, help='Seconds per stub encode call in task_loop')
+    parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown of a primary metric before it counts as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=0.1,
+                        help='Slowdowns smaller than this many milliseconds never count as regressions')
+    parser.add_argument('--update-baseline', action='store_true', help='Write this run to --baseline instead')
+    args = parser.parse_args()
+
+    report = run(args.scenario or list(SCENARIOS), quick=args.quick, repeat=args.repeat,
+                 options={'llm_latency': args.llm_latency, 'embed_latency': args.embed_latency})
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(text + '\n')
+        print(f"[BENCH] Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"[BENCH] No baseline at {args.baseline}; run with --update-baseline to create one", file=sys.stderr)
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"[BENCH] {len(regressions)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
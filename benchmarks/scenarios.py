@@ -0,0 +1,165 @@
+import contextlib
+import json
+import os
+import statistics
+import tempfile
+import time
+import numpy as np
+from benchmarks.fakes import FakeEmbedder, FakeLLM
+from embedding_worker import EmbeddingWorker
+from llm_batcher import BatchingLLM
+from metrics import registry as metrics
+from results_journal import ResultsJournal
+from task_manager import TaskManager
+from tool_executor import ToolExecutor, parse_tool_calls
+from vector_store import VectorStore, normalize_rows
+
+
+def latency_stats(seconds):
+    """p50/p95/mean in milliseconds of a list of per-operation timings."""
+    ordered = sorted(seconds)
+    return {
+        'p50_ms': round(statistics.median(ordered) * 1000, 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 4),
+    }
+
+
+def fake_store(embedder=None):
+    return VectorStore('local', 'benchmark', embedding_model=embedder or FakeEmbedder())
+
+
+def fill_local_index(store, count, seed=0):
+    """
+    Bulk-load count random unit vectors into a local store's MatrixIndex. One add() per row would make setup
+    dominate at 1M entries; every row shares one metadata dict to keep memory down.
+    """
+    index = store.index
+    rng = np.random.default_rng(seed)
+    index._reserve(count)
+    for start in range(0, count, 65536):
+        stop = min(start + 65536, count)
+        index.vectors[start:stop] = normalize_rows(rng.standard_normal((stop - start, index.dim)))
+    index.ids = [f'task-{i}' for i in range(count)]
+    index.metadata = [{'task': 'benchmark task', 'result': 'benchmark result'}] * count
+    index.rows = {task_id: row for row, task_id in enumerate(index.ids)}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the TaskManager's terminal output while a scenario runs."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def vector_query(entries, queries=200, top_k=5):
+    """VectorStore.query_tasks on the exact local index: embedding the query (stub encoder) plus the search."""
+    store = fake_store()
+    fill_local_index(store, entries)
+    store.query_tasks('warm-up query', top_k=top_k)
+    timings = []
+    for n in range(queries):
+        started = time.perf_counter()
+        store.query_tasks(f'benchmark query {n}', top_k=top_k)
+        timings.append(time.perf_counter() - started)
+    stats = latency_stats(timings)
+    stats['queries_per_sec'] = round(queries / sum(timings), 2)
+    return stats
+
+
+def task_loop(tasks, workers=4, llm_latency=0.0, embed_latency=0.0):
+    """
+    TaskManager.run_concurrent over `tasks` generated tasks with the stub LLM (batched) and stub encoder,
+    a real EmbeddingWorker, ToolExecutor and results journal. Also reports each stage's share of the time.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = fake_store(FakeEmbedder(latency=embed_latency))
+        llm = BatchingLLM(FakeLLM(tasks=tasks, latency=llm_latency))
+        worker = EmbeddingWorker(store)
+        executor = ToolExecutor()
+        manager = TaskManager(llm, store, max_tasks=tasks, log_file=os.path.join(directory, 'output.log'),
+                              results_file=os.path.join(directory, 'results.jsonl'), embedding_worker=worker,
+                              stream_output=False, tool_executor=executor)
+        metrics.reset()
+        try:
+            with quiet():
+                started = time.perf_counter()
+                manager.run_concurrent('Benchmark objective', workers=workers, max_executions=tasks)
+                worker.flush()
+                seconds = time.perf_counter() - started
+        finally:
+            llm.close()
+            worker.close()
+            executor.shutdown()
+            manager.logger.close()
+            manager.completed.close()
+        executed = metrics.counter('tasks_total', outcome='ok')
+        return {
+            'tasks': executed,
+            'seconds': round(seconds, 4),
+            'ms_per_task': round(seconds / executed * 1000, 4) if executed else None,
+            'tasks_per_sec': round(executed / seconds, 2),
+            'stage_share': metrics.snapshot()['stage_share'],
+        }
+
+
+def save_results(existing, appends=200):
+    """
+    Appending a result and save_results() (fsync) on a journal that already holds `existing` records,
+    plus the cost of opening it (the TaskManager reads its tail for memory). Should stay flat as it grows.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results.jsonl')
+        line = json.dumps({'task': 'benchmark task', 'result': 'benchmark result ' * 20}) + '\n'
+        with open(path, 'w') as f:
+            f.writelines(line for _ in range(existing))
+        started = time.perf_counter()
+        journal = ResultsJournal(path)
+        journal.tail(100)
+        open_seconds = time.perf_counter() - started
+        timings = []
+        try:
+            for n in range(appends):
+                started = time.perf_counter()
+                journal.append({'task': f'task {n}', 'result': 'benchmark result ' * 20})
+                journal.sync()
+                timings.append(time.perf_counter() - started)
+        finally:
+            journal.close()
+    stats = latency_stats(timings)
+    stats['open_ms'] = round(open_seconds * 1000, 4)
+    return stats
+
+
+def tool_dispatch(calls=500):
+    """ToolExecutor round trips for a cheap tool, one at a time and all at once, and TOOL: line parsing."""
+    executor = ToolExecutor()
+    try:
+        executor.submit('sha256_hasher', 'warm-up').result()
+        timings = []
+        for n in range(calls):
+            started = time.perf_counter()
+            executor.submit('sha256_hasher', f'payload {n}').result()
+            timings.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        executor.run([('sha256_hasher', f'payload {n}') for n in range(calls)])
+        concurrent_seconds = time.perf_counter() - started
+    finally:
+        executor.shutdown()
+    text = '\n'.join(f'TOOL: sha256_hasher: payload {n}\nSome prose between directives.' for n in range(100))
+    started = time.perf_counter()
+    for _ in range(100):
+        parse_tool_calls(text)
+    stats = latency_stats(timings)
+    stats['concurrent_calls_per_sec'] = round(calls / concurrent_seconds, 2)
+    stats['parse_100_directives_ms'] = round((time.perf_counter() - started) * 10, 4)
+    return stats
+
+
+# name -> (function, {parameter: [values]}, primary metric; lower is better for every primary metric)
+SCENARIOS = {
+    'vector_query': (vector_query, {'entries': [1000, 100000, 1000000]}, 'p50_ms'),
+    'task_loop': (task_loop, {'tasks': [20, 100]}, 'ms_per_task'),
+    'save_results': (save_results, {'existing': [1000, 10000, 100000]}, 'p50_ms'),
+    'tool_dispatch': (tool_dispatch, {}, 'p50_ms'),
+}
@@ -0,0 +1,48 @@
+import json
+import os
+import threading
+import time
+
+
+class Checkpoint:
+    """
+    Snapshot of TaskManager state in a small JSON file, replaced atomically (write + fsync + rename), so a
+    crash leaves either the previous or the new checkpoint. Completed results are not copied: they are already
+    in the results journal, and the checkpoint only records how many of them there were.
+    save() is throttled to one write per min_interval seconds unless forced.
+    """
+    def __init__(self, path='checkpoint.json', min_interval=1.0):
+        self.path = path
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.last_saved = 0.0
+        self.saves = 0
+
+    def save(self, state, force=False):
+        """Write state unless the last save was less than min_interval ago; returns whether it was written."""
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_saved < self.min_interval:
+                return False
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(state, saved_at=time.time()), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.last_saved = now
+            self.saves += 1
+            return True
+
+    def load(self):
+        """The last saved state, or None if there is no readable checkpoint."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def clear(self):
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
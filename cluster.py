@@ -0,0 +1,292 @@
+import copy
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait as wait_connections
+from multiprocessing.managers import BaseManager
+from batch_runner import BatchOutput, run_objective_record
+
+# VectorStore methods callable through the shared store's proxies
+STORE_METHODS = ('embed_text', 'embed_many', 'add_task', 'query_tasks', 'query_tasks_many', 'recall_report')
+
+
+class VectorStoreManager(BaseManager):
+    """Serves one VectorStore to the worker processes over a local socket."""
+
+
+VectorStoreManager.register('vector_store', exposed=STORE_METHODS)
+
+_shared_store = None
+
+
+def _get_shared_store():
+    return _shared_store
+
+
+def serve_vector_store(config, address, authkey):
+    """Process entry point: load the vector store once and serve it until terminated."""
+    global _shared_store
+    from agent_runtime import vector_store_arguments
+    from vector_store import VectorStore
+    args, kwargs = vector_store_arguments(config['vector_store'])
+    _shared_store = VectorStore(*args, **kwargs)
+    VectorStoreManager.register('vector_store', callable=_get_shared_store, exposed=STORE_METHODS)
+    VectorStoreManager(address=address, authkey=authkey).get_server().serve_forever()
+
+
+def connect_vector_store(address, authkey, timeout=300):
+    """Proxy to the shared vector store, waiting up to timeout seconds for its server to come up."""
+    deadline = time.monotonic() + timeout
+    while True:
+        manager = VectorStoreManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager.vector_store()
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def worker_main(worker_id, config, address, authkey, conn, options):
+    """
+    Worker process entry point: build an AgentRuntime over the shared vector store, then run the objectives the
+    coordinator sends over conn, one at a time, sending back a result record for each. A background thread
+    sends heartbeats throughout, including while the model loads.
+    """
+    from agent_runtime import AgentRuntime
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def heartbeat():
+        while not stopped.wait(options['heartbeat_interval']):
+            try:
+                send(('heartbeat', worker_id))
+            except OSError:
+                return
+
+    threading.Thread(target=heartbeat, name='heartbeat', daemon=True).start()
+    runtime = None
+    try:
+        runtime = AgentRuntime(config, batching=True, vector_store=connect_vector_store(address, authkey))
+        send(('ready', worker_id))
+
+        def run_objective(manager, objective):
+            if options['dag']:
+                manager.run_graph(objective, max_parallel=options['workers'], max_executions=runtime.max_executions)
+            else:
+                manager.run_concurrent(objective, workers=options['workers'], max_executions=runtime.max_executions)
+
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            objective_id, objective = message
+            before = runtime.llm.token_usage()['completion_tokens']
+            record = run_objective_record(runtime.make_objective_manager, run_objective, objective_id, objective)
+            record['worker'] = worker_id
+            record['completion_tokens'] = runtime.llm.token_usage()['completion_tokens'] - before
+            send(('result', worker_id, record))
+    except (EOFError, KeyboardInterrupt):
+        pass  # coordinator went away or the run was interrupted
+    finally:
+        stopped.set()
+        if runtime is not None:
+            runtime.close()
+
+
+class Coordinator:
+    """
+    Runs objectives across `processes` worker processes, each with its own LLM, over one vector store
+    served by a separate process, so the embedding model and index are loaded once and shared.
+    - Objectives are handed to idle workers one at a time over per-worker pipes, and the input is read
+      only as workers free up.
+    - Results are recorded as in --batch mode (BatchOutput); objectives already done are skipped.
+    - Health checks: a worker whose process has exited or whose heartbeats stopped for heartbeat_timeout
+      seconds is killed and restarted, and its objective is handed to another worker, up to max_attempts
+      runs in total. If the vector store process dies it is restarted along with every worker. More than
+      max_restarts restarts abort the run.
+    - With pin_cores, each worker is pinned to its own slice of the CPUs and sizes torch's threads to it.
+    """
+    def __init__(self, config, processes=4, output_path='batch_results.jsonl', workers=2, dag=False,
+                 heartbeat_interval=5.0, heartbeat_timeout=60.0, max_restarts=10, max_attempts=2, pin_cores=True):
+        self.config = config
+        self.processes = processes
+        self.output = BatchOutput(output_path)
+        self.options = {'workers': workers, 'dag': dag, 'heartbeat_interval': heartbeat_interval}
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_restarts = max_restarts
+        self.max_attempts = max_attempts
+        self.pin_cores = pin_cores
+        # spawn, not fork: every process loads its own models and the coordinator may hold locks
+        self.context = multiprocessing.get_context('spawn')
+        self.directory = tempfile.mkdtemp(prefix='babyagi-cluster-')
+        if hasattr(socket, 'AF_UNIX'):
+            self.address = os.path.join(self.directory, 'vector_store.sock')
+        else:
+            with socket.socket() as probe:
+                probe.bind(('127.0.0.1', 0))
+                self.address = probe.getsockname()
+        self.authkey = os.urandom(16)
+        self.store_process = None
+        self.workers = {}  # worker id -> {'process', 'conn', 'last_seen', 'objective'}
+        self.attempts = {}  # objective id -> runs started
+        self.retry = deque()
+        self.restarts = 0
+        self.counts = {'done': 0, 'error': 0, 'skipped': 0}
+        self.completion_tokens = 0
+
+    def worker_config(self, worker_id):
+        """Config for one worker: its own log file and, with pin_cores, its own slice of the CPUs."""
+        config = copy.deepcopy(self.config)
+        log_cfg = config.setdefault('logging', {})
+        root, ext = os.path.splitext(log_cfg.get('file', 'output.log'))
+        log_cfg['file'] = f"{root}.worker{worker_id}{ext}"
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count()))
+        per_worker = len(cpus) // self.processes
+        if self.pin_cores and per_worker:
+            llm_cfg = config['llm']
+            llm_cfg['cpu_affinity'] = cpus[worker_id * per_worker:(worker_id + 1) * per_worker]
+            llm_cfg['threads'] = llm_cfg.get('threads') or per_worker
+        return config
+
+    def _start_store(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)  # left behind by a crashed server
+        self.store_process = self.context.Process(target=serve_vector_store, name='vector-store',
+                                                  args=(self.config, self.address, self.authkey), daemon=True)
+        self.store_process.start()
+
+    def _start_worker(self, worker_id):
+        conn, child_conn = self.context.Pipe()
+        # Not a daemon: workers run CPU tools in a process pool of their own
+        process = self.context.Process(target=worker_main, name=f'agent-worker-{worker_id}', args=(
+            worker_id, self.worker_config(worker_id), self.address, self.authkey, child_conn, self.options))
+        process.start()
+        child_conn.close()
+        self.workers[worker_id] = {'process': process, 'conn': conn, 'last_seen': time.monotonic(),
+                                   'objective': None}
+
+    def _stop_worker(self, worker_id):
+        worker = self.workers.pop(worker_id)
+        process = worker['process']
+        if process.is_alive():
+            process.terminate()
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        worker['conn'].close()
+        return worker['objective']
+
+    def _restart_worker(self, worker_id, reason):
+        self.restarts += 1
+        print(f"[WARN] Restarting worker {worker_id}: {reason}")
+        objective = self._stop_worker(worker_id)
+        if objective is not None:
+            objective_id, text = objective
+            if self.attempts[objective_id] >= self.max_attempts:
+                self.output.write({'id': objective_id, 'objective': text, 'status': 'error',
+                                   'error': f"worker failed {self.attempts[objective_id]} times ({reason})"})
+                self.counts['error'] += 1
+            else:
+                self.retry.append(objective)
+        if self.restarts > self.max_restarts:
+            raise RuntimeError(f"Giving up after {self.restarts} worker restarts")
+        self._start_worker(worker_id)
+
+    def _check_health(self):
+        if not self.store_process.is_alive():
+            print(f"[WARN] Vector store process exited ({self.store_process.exitcode}); restarting it and all workers")
+            self._start_store()
+            for worker_id in list(self.workers):
+                self._restart_worker(worker_id, 'vector store restarted')
+            return
+        now = time.monotonic()
+        for worker_id, worker in list(self.workers.items()):
+            if not worker['process'].is_alive():
+                self._restart_worker(worker_id, f"process exited with code {worker['process'].exitcode}")
+            elif now - worker['last_seen'] > self.heartbeat_timeout:
+                self._restart_worker(worker_id, f"no heartbeat for {now - worker['last_seen']:.0f}s")
+
+    def _next_objective(self, objectives):
+        if self.retry:
+            return self.retry.popleft()
+        for objective_id, objective in objectives:
+            if objective_id in self.output.done_ids or objective_id in self.attempts or not objective:
+                self.counts['skipped'] += 1
+                continue
+            return objective_id, objective
+        return None
+
+    def _dispatch(self, objectives):
+        for worker in self.workers.values():
+            if worker['objective'] is not None:
+                continue
+            objective = self._next_objective(objectives)
+            if objective is None:
+                return
+            self.attempts[objective[0]] = self.attempts.get(objective[0], 0) + 1
+            worker['objective'] = objective
+            worker['conn'].send(objective)
+
+    def _receive(self, worker_id):
+        worker = self.workers[worker_id]
+        try:
+            message = worker['conn'].recv()
+        except (EOFError, OSError):
+            return  # the process is gone; the health check restarts it
+        worker['last_seen'] = time.monotonic()
+        if message[0] == 'result':
+            record = message[2]
+            worker['objective'] = None
+            self.output.write(record)
+            self.counts[record['status']] += 1
+            self.completion_tokens += record.get('completion_tokens', 0)
+
+    def run(self, objectives):
+        """Run (id, objective) pairs across the workers and return a throughput summary."""
+        started = time.perf_counter()
+        objectives = iter(objectives)
+        self._start_store()
+        for worker_id in range(self.processes):
+            self._start_worker(worker_id)
+        interval = self.options['heartbeat_interval']
+        while True:
+            self._dispatch(objectives)
+            if not any(w['objective'] is not None for w in self.workers.values()):
+                break
+            by_conn = {w['conn']: worker_id for worker_id, w in self.workers.items()}
+            for conn in wait_connections(list(by_conn), timeout=interval):
+                self._receive(by_conn[conn])
+            self._check_health()
+        elapsed = time.perf_counter() - started
+        finished = self.counts['done'] + self.counts['error']
+        return dict(self.counts, restarts=self.restarts, seconds=round(elapsed, 3),
+                    objectives_per_hour=round(finished * 3600 / elapsed, 2) if elapsed else 0.0,
+                    completion_tokens=self.completion_tokens,
+                    tokens_per_sec=round(self.completion_tokens / elapsed, 2) if elapsed else 0.0)
+
+    def close(self):
+        for worker_id, worker in list(self.workers.items()):
+            try:
+                worker['conn'].send(None)
+            except OSError:
+                pass
+        for worker_id in list(self.workers):
+            self.workers[worker_id]['process'].join(30)
+            self._stop_worker(worker_id)
+        if self.store_process is not None and self.store_process.is_alive():
+            self.store_process.terminate()
+            self.store_process.join()
+        self.output.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
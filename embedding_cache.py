@@ -0,0 +1,93 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed cache of embeddings: an in-memory LRU tier of max_entries vectors,
+    optionally backed by an SQLite file so embeddings survive restarts.
+    Keys include the embedding model name so switching models never returns stale vectors.
+    """
+    def __init__(self, namespace='', max_entries=10000, path=None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self.db.commit()
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key, vector):
+        self.entries[key] = vector
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_many(self, texts):
+        """Return a list aligned with texts holding cached vectors, or None for misses."""
+        keys = [self.key(t) for t in texts]
+        found = [None] * len(texts)
+        with self.lock:
+            missing = []
+            for i, key in enumerate(keys):
+                vector = self.entries.get(key)
+                if vector is not None:
+                    self.entries.move_to_end(key)
+                    found[i] = vector
+                    self.hits += 1
+                else:
+                    missing.append(i)
+            if missing and self.db is not None:
+                wanted = list({keys[i] for i in missing})
+                stored = {}
+                for start in range(0, len(wanted), 500):
+                    batch = wanted[start:start + 500]
+                    rows = self.db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+                    stored.update((k, np.frombuffer(v, dtype=np.float32)) for k, v in rows)
+                still_missing = []
+                for i in missing:
+                    vector = stored.get(keys[i])
+                    if vector is None:
+                        still_missing.append(i)
+                        continue
+                    self._remember(keys[i], vector)
+                    found[i] = vector
+                    self.disk_hits += 1
+                missing = still_missing
+            self.misses += len(missing)
+        return found
+
+    def put_many(self, texts, vectors):
+        with self.lock:
+            rows = []
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+            if self.db is not None and rows:
+                self.db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self.db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
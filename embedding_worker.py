@@ -0,0 +1,68 @@
+import threading
+import time
+from batch_queue import BatchQueue
+from metrics import SIZE_BUCKETS, registry as metrics
+
+metrics.set_buckets('embedding_batch_size', SIZE_BUCKETS)
+
+
+class EmbeddingWorker:
+    """
+    Background thread that embeds task results and upserts them into the vector store,
+    keeping the encoder off the task execution path. Items submitted close together are
+    micro-batched into one VectorStore.embed_many call.
+    """
+    def __init__(self, vector_store, batch_size=32, max_wait=0.05, max_queue=1024):
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue = BatchQueue(maxsize=max_queue)
+        self.embedded = 0
+        self.errors = 0
+        self.last_error = None
+        self.thread = threading.Thread(target=self._run, name='embedding-worker', daemon=True)
+        self.thread.start()
+
+    def submit(self, task_id, text, metadata, on_stored=None):
+        """Queue an item; on_stored() is called from the worker thread once it is in the vector store."""
+        self.queue.put((task_id, text, metadata, on_stored))
+
+    def _run(self):
+        while True:
+            items, stop = self.queue.next_batch(self.batch_size, self.max_wait)
+            try:
+                if items:
+                    with metrics.time('embedding_batch_seconds'):
+                        vectors = self.vector_store.embed_many([text for _, text, _, _ in items])
+                        for (task_id, _, metadata, on_stored), vector in zip(items, vectors):
+                            self.vector_store.add_task(task_id, vector.tolist(), metadata)
+                            if on_stored is not None:
+                                on_stored()
+                    self.embedded += len(items)
+                    metrics.inc('embedded_results_total', len(items))
+                    metrics.observe('embedding_batch_size', len(items))
+            except Exception as e:
+                self.errors += len(items)
+                self.last_error = e
+                metrics.inc('embedding_errors_total', len(items))
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+            if stop:
+                return
+
+    def flush(self, timeout=None):
+        """Wait until every submitted item has been stored. Returns False if the timeout expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.close()
+            self.thread.join()
@@ -0,0 +1,152 @@
+import codecs
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+HTTPResult = namedtuple('HTTPResult', ['status_code', 'text', 'truncated', 'from_cache'])
+
+
+class HTTPClient:
+    """
+    Shared HTTP client for the network tools.
+    - One requests.Session with a keep-alive connection pool per host.
+    - Bodies are streamed and reading stops once `limit` characters have been decoded.
+    - Successful GETs are cached on disk (SQLite). Within ttl_seconds a cached body is served without any
+      request; after that it is revalidated with If-None-Match / If-Modified-Since, and a 304 reuses it.
+    - Status checks use HEAD, falling back to a GET whose body is never read.
+    """
+    def __init__(self, cache_path='http_cache.sqlite', ttl_seconds=300, timeout=10, pool_connections=32,
+                 pool_maxsize=8, user_agent='BabyAGI/1.0'):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.db = None
+        if cache_path:
+            self.db = sqlite3.connect(cache_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache (url TEXT PRIMARY KEY, body TEXT, truncated INTEGER, "
+                "char_limit INTEGER, etag TEXT, last_modified TEXT, fetched REAL)")
+            self.db.commit()
+
+    def _cached(self, url):
+        if self.db is None:
+            return None
+        with self.lock:
+            return self.db.execute(
+                "SELECT body, truncated, char_limit, etag, last_modified, fetched FROM http_cache WHERE url = ?",
+                (url,)).fetchone()
+
+    def _store(self, url, body, truncated, limit, etag, last_modified):
+        if self.db is None:
+            return
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO http_cache (url, body, truncated, char_limit, etag, last_modified, fetched) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (url, body, int(truncated), limit, etag, last_modified, time.time()))
+            self.db.commit()
+
+    def _touch(self, url):
+        with self.lock:
+            self.db.execute("UPDATE http_cache SET fetched = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+
+    @staticmethod
+    def _read_text(resp, limit):
+        """Decode at most limit + 1 characters of the streamed body, then stop reading."""
+        decoder = codecs.getincrementaldecoder(resp.encoding or 'utf-8')(errors='replace')
+        parts = []
+        length = 0
+        for chunk in resp.iter_content(chunk_size=8192):
+            text = decoder.decode(chunk)
+            parts.append(text)
+            length += len(text)
+            if length > limit:
+                break
+        else:
+            parts.append(decoder.decode(b'', final=True))
+        text = ''.join(parts)
+        return text[:limit], len(text) > limit
+
+    def fetch(self, url, limit=1000):
+        """GET url and return an HTTPResult with at most `limit` characters of the body."""
+        row = self._cached(url)
+        # A cached body only helps if it was read at least as far as this caller needs
+        usable = row is not None and (not row[1] or row[2] >= limit)
+        if usable:
+            body, truncated, cached_limit, etag, last_modified, fetched = row
+            truncated = bool(truncated) or len(body) > limit
+            if time.time() - fetched < self.ttl_seconds:
+                self.hits += 1
+                return HTTPResult(200, body[:limit], truncated, True)
+        headers = {}
+        if usable and row[3]:
+            headers['If-None-Match'] = row[3]
+        if usable and row[4]:
+            headers['If-Modified-Since'] = row[4]
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as resp:
+            if resp.status_code == 304 and usable:
+                self._touch(url)
+                self.revalidated += 1
+                return HTTPResult(200, row[0][:limit], truncated, True)
+            self.misses += 1
+            if resp.status_code != 200:
+                return HTTPResult(resp.status_code, '', False, False)
+            text, truncated = self._read_text(resp, limit)
+            self._store(url, text, truncated, limit, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+            return HTTPResult(200, text, truncated, False)
+
+    def status(self, url):
+        """HTTP status code of url, via HEAD (or a GET whose body is not downloaded if HEAD is refused)."""
+        resp = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        if resp.status_code in (405, 501):
+            with self.session.get(url, stream=True, timeout=self.timeout) as resp:
+                return resp.status_code
+        return resp.status_code
+
+    def stats(self):
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.revalidated) / lookups if lookups else 0.0,
+        }
+
+
+_client = None
+_client_options = {}
+_client_lock = threading.Lock()
+
+
+def configure(**options):
+    """Set the options used to build the shared client (see HTTPClient); replaces any existing client."""
+    global _client, _client_options
+    with _client_lock:
+        _client_options = options
+        _client = None
+
+
+def shared_client():
+    """The process-wide HTTPClient used by the network tools, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient(**_client_options)
+        return _client
+
+
+def shared_stats():
+    """Cache stats of the shared client, or None if no network tool has used it yet."""
+    with _client_lock:
+        return _client.stats() if _client is not None else None
@@ -0,0 +1,148 @@
+import time
+import numpy as np
+from vector_store import MatrixIndex, normalize_rows, top_k_rows
+
+
+def spherical_kmeans(vectors, k, iterations=20, seed=0, chunk_size=65536):
+    """Cluster unit-length vectors by cosine similarity; returns (k, dim) unit-length centroids."""
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    centroids = vectors[rng.choice(n, size=k, replace=False)].copy()
+    assignments = np.zeros(n, dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, n, chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # Reseed empty clusters with random points so every list stays in use
+            sums[empty] = vectors[rng.choice(n, size=int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Approximate cosine-similarity index (inverted file with k-means coarse quantization).
+    Vectors are stored in a MatrixIndex; once enough have been added, k-means centroids are trained
+    and each vector is filed under its nearest centroid. A query scans only the nprobe closest lists.
+    Until training happens (and whenever nprobe >= nlist) queries are exact.
+    """
+    def __init__(self, nlist=256, nprobe=8, min_train_per_list=39, retrain_factor=4.0, kmeans_iterations=20, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_per_list = min_train_per_list
+        self.retrain_factor = retrain_factor
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.store = MatrixIndex()
+        self.centroids = None
+        self.lists = []           # list id -> [row, ...]
+        self.list_arrays = []     # cached np.ndarray views of self.lists (None when stale)
+        self.assignments = {}     # row -> list id
+        self.trained_size = 0
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def train(self):
+        """(Re)train centroids on the stored vectors and rebuild the inverted lists."""
+        n = len(self.store)
+        nlist = min(self.nlist, max(1, n // self.min_train_per_list))
+        vectors = self.store.vectors[:n]
+        sample_size = min(n, nlist * 256)
+        if sample_size < n:
+            sample = vectors[np.random.default_rng(self.seed).choice(n, size=sample_size, replace=False)]
+        else:
+            sample = vectors
+        self.centroids = spherical_kmeans(sample, nlist, iterations=self.kmeans_iterations, seed=self.seed)
+        assigned = np.argmax(vectors @ self.centroids.T, axis=1)
+        self.lists = [[] for _ in range(nlist)]
+        self.assignments = {}
+        for row, list_id in enumerate(assigned.tolist()):
+            self.lists[list_id].append(row)
+            self.assignments[row] = list_id
+        self.list_arrays = [None] * nlist
+        self.trained_size = n
+
+    def add(self, task_id, embedding, metadata):
+        self.store.add(task_id, embedding, metadata)
+        row = self.store.rows[task_id]
+        n = len(self.store)
+        if not self.trained:
+            if n >= self.nlist * self.min_train_per_list:
+                self.train()
+            return
+        if n >= self.trained_size * self.retrain_factor:
+            self.train()
+            return
+        list_id = int(np.argmax(self.centroids @ self.store.vectors[row]))
+        previous = self.assignments.get(row)
+        if previous == list_id:
+            return
+        if previous is not None:
+            self.lists[previous].remove(row)
+            self.list_arrays[previous] = None
+        self.lists[list_id].append(row)
+        self.list_arrays[list_id] = None
+        self.assignments[row] = list_id
+
+    def _list_rows(self, list_id):
+        rows = self.list_arrays[list_id]
+        if rows is None:
+            rows = np.asarray(self.lists[list_id], dtype=np.int64)
+            self.list_arrays[list_id] = rows
+        return rows
+
+    def query(self, embedding, top_k=3, nprobe=None):
+        return self.query_many([embedding], top_k=top_k, nprobe=nprobe)[0]
+
+    def query_many(self, embeddings, top_k=3, nprobe=None):
+        nprobe = self.nprobe if nprobe is None else nprobe
+        if not self.trained or nprobe >= len(self.centroids):
+            return self.store.query_many(embeddings, top_k=top_k)
+        queries = normalize_rows(embeddings)
+        probes = top_k_rows(queries @ self.centroids.T, nprobe)
+        results = []
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate([self._list_rows(l) for l in lists])
+            if rows.size == 0:
+                results.append([])
+                continue
+            scores = self.store.vectors[rows] @ query
+            best = top_k_rows(scores[np.newaxis, :], top_k)[0]
+            results.append([
+                (float(scores[i]), self.store.ids[rows[i]], self.store.metadata[rows[i]]) for i in best
+            ])
+        return results
+
+    def recall_report(self, embeddings, top_k=10, nprobe=None):
+        """Compare approximate results against exact search over the same vectors: recall@k and latency."""
+        start = time.perf_counter()
+        exact = self.store.query_many(embeddings, top_k=top_k)
+        exact_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        approx = self.query_many(embeddings, top_k=top_k, nprobe=nprobe)
+        approx_seconds = time.perf_counter() - start
+        hits = total = 0
+        for e, a in zip(exact, approx):
+            expected = {tid for _, tid, _ in e}
+            hits += len(expected & {tid for _, tid, _ in a})
+            total += len(expected)
+        queries = max(len(exact), 1)
+        return {
+            'top_k': top_k,
+            'nprobe': self.nprobe if nprobe is None else nprobe,
+            'nlist': len(self.centroids) if self.trained else 0,
+            'size': len(self.store),
+            'recall': hits / total if total else 1.0,
+            'exact_ms_per_query': exact_seconds * 1000 / queries,
+            'approx_ms_per_query': approx_seconds * 1000 / queries,
+        }
@@ -0,0 +1,55 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def record_time(times, name):
+    """Add the wall-clock seconds spent in the block to times[name]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        times[name] = times.get(name, 0.0) + time.perf_counter() - start
+
+
+class BackgroundLoader:
+    """
+    Builds factory(*args, **kwargs) on a background thread so slow loads (models, remote indexes) overlap.
+    The loader stands in for the object it builds: attribute access waits for the load to finish and
+    forwards to the result, re-raising any exception raised by the factory.
+    """
+    def __init__(self, name, factory, *args, **kwargs):
+        self._name = name
+        self._value = None
+        self._error = None
+        self._seconds = None
+        self._thread = threading.Thread(target=self._load, args=(factory, args, kwargs), name=f'load-{name}', daemon=True)
+        self._thread.start()
+
+    def _load(self, factory, args, kwargs):
+        start = time.perf_counter()
+        try:
+            self._value = factory(*args, **kwargs)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._seconds = time.perf_counter() - start
+
+    @property
+    def ready(self):
+        return not self._thread.is_alive()
+
+    @property
+    def seconds(self):
+        """Load duration, available once the load has finished."""
+        return self._seconds
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Loading {self._name} failed: {self._error}") from self._error
+        return self._value
+
+    def __getattr__(self, name):
+        return getattr(self.result(), name)
@@ -1,14 +1,207 @@
 import os
-from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
+import threading
+import time
+from lazy_loader import record_time
+from llm_backends import apply_backend, configure_threads, load_dtype
+from metrics import registry as metrics
+
+
+def stop_on_event(event):
+    """StoppingCriteriaList that ends model.generate once the given threading.Event is set."""
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class StopOnEvent(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return event.is_set()
+
+    return StoppingCriteriaList([StopOnEvent()])
+
 
 class LLM:
-    def __init__(self, model_path, max_tokens=512):
+    """
+    Local causal LM. backend selects how the weights run on CPU (fp32 | bf16 | int8, see llm_backends), compile
+    wraps the forward pass in torch.compile, and num_threads / interop_threads / cpu_affinity size torch's
+    thread pools. Every backend is used through the same generate / generate_batch / stream API.
+    """
+    def __init__(self, model_path, max_tokens=512, cache=None, prefix_cache=None, backend='fp32', compile=False,
+                 num_threads=None, interop_threads=None, cpu_affinity=None):
         self.model_path = model_path
         self.max_tokens = max_tokens
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.model = AutoModelForCausalLM.from_pretrained(model_path)
-        self.generator = pipeline('text-generation', model=self.model, tokenizer=self.tokenizer)
+        self.cache = cache  # optional llm_cache.ResponseCache
+        self.prefix_cache = prefix_cache  # optional prefix_cache.PrefixCache
+        self.load_times = {}  # stage -> seconds, reported by babyagi.py --profile-startup
+        self.usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'generations': 0}  # excludes cache hits
+        self.usage_lock = threading.Lock()
+        with record_time(self.load_times, 'import transformers'):
+            from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
+        self.backend = backend
+        configure_threads(num_threads, interop_threads, cpu_affinity)
+        with record_time(self.load_times, 'load tokenizer'):
+            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        # Batched generation pads prompts on the left so every completion starts at the same position
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.tokenizer.padding_side = 'left'
+        with record_time(self.load_times, 'load model'):
+            # low_cpu_mem_usage loads weights straight into the model instead of through a second full copy
+            self.model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=load_dtype(backend),
+                                                              low_cpu_mem_usage=True)
+        with record_time(self.load_times, f'apply {backend} backend'):
+            self.model = apply_backend(self.model, backend, compile=compile)
+        with record_time(self.load_times, 'build pipeline'):
+            self.generator = pipeline('text-generation', model=self.model, tokenizer=self.tokenizer)
+
+    def generation_params(self):
+        # max_new_tokens bounds the completion alone, however long the prompt is; only the completion is returned
+        return {'max_new_tokens': self.max_tokens, 'return_full_text': False, 'num_return_sequences': 1}
+
+    @property
+    def context_window(self):
+        """Maximum prompt + completion length in tokens, or None if the model does not say."""
+        window = getattr(self.model.config, 'max_position_embeddings', None)
+        return window or (self.tokenizer.model_max_length if self.tokenizer.model_max_length < 10 ** 9 else None)
+
+    def count_tokens(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate_tokens(self, text, max_tokens):
+        ids = self.tokenizer.encode(text, add_special_tokens=False)
+        if len(ids) <= max_tokens:
+            return text
+        return self.tokenizer.decode(ids[:max_tokens], skip_special_tokens=True)
+
+    def _record_usage(self, prompt, completion):
+        prompt_tokens = len(self.tokenizer.encode(prompt))
+        completion_tokens = len(self.tokenizer.encode(completion, add_special_tokens=False))
+        with self.usage_lock:
+            self.usage['prompt_tokens'] += prompt_tokens
+            self.usage['completion_tokens'] += completion_tokens
+            self.usage['generations'] += 1
+        metrics.inc('llm_prompt_tokens_total', prompt_tokens)
+        metrics.inc('llm_completion_tokens_total', completion_tokens)
+
+    def token_usage(self):
+        with self.usage_lock:
+            return dict(self.usage)
+
+    def register_prefix(self, text):
+        """
+        Mark text as a common prompt opening whose KV state is worth keeping. Trailing whitespace is dropped,
+        since tokenizers usually merge it into the next word and the prefix would then never match.
+        """
+        if self.prefix_cache is not None:
+            self.prefix_cache.register(self.tokenizer.encode(text.rstrip()))
+
+    def _prefix_state(self, ids):
+        """A copy of the cached past_key_values for the longest registered prefix of ids, computing it once."""
+        if self.prefix_cache is None:
+            return None
+        prefix = self.prefix_cache.match(ids)
+        if prefix is None:
+            return None
+        past_key_values = self.prefix_cache.get(prefix)
+        if past_key_values is None:
+            import torch
+            with torch.no_grad():
+                output = self.model(input_ids=torch.tensor([prefix], device=self.model.device), use_cache=True)
+            self.prefix_cache.put(prefix, output.past_key_values)
+            past_key_values = self.prefix_cache.get(prefix)
+        return past_key_values
+
+    def _generate_inputs(self, prompt):
+        """model.generate arguments for one prompt, resuming from a cached prefix state when there is one."""
+        import torch
+        ids = self.tokenizer.encode(prompt)
+        input_ids = torch.tensor([ids], device=self.model.device)
+        inputs = dict(input_ids=input_ids, attention_mask=torch.ones_like(input_ids), max_new_tokens=self.max_tokens,
+                      pad_token_id=self.tokenizer.pad_token_id)
+        past_key_values = self._prefix_state(ids)
+        if past_key_values is not None:
+            inputs['past_key_values'] = past_key_values  # generate only prefills the tokens after the prefix
+        return inputs
+
+    def _generate_one(self, prompt):
+        import torch
+        inputs = self._generate_inputs(prompt)
+        with torch.no_grad():
+            output = self.model.generate(**inputs)
+        return self.tokenizer.decode(output[0, inputs['input_ids'].shape[1]:], skip_special_tokens=True)
 
     def generate(self, prompt):
-        result = self.generator(prompt, max_length=self.max_tokens, num_return_sequences=1)
-        return result[0]['generated_text'] 
\ No newline at end of file
+        return self.generate_batch([prompt])[0]
+
+    def generate_batch(self, prompts):
+        """Generate completions for several prompts; cache misses share padded forward passes."""
+        params = self.generation_params()
+        results = [None] * len(prompts)
+        embeddings = [None] * len(prompts)
+        if self.cache is not None:
+            for i, prompt in enumerate(prompts):
+                results[i], embeddings[i] = self.cache.get(self.model_path, params, prompt)
+        pending = [i for i, r in enumerate(results) if r is None]
+        if len(pending) == 1 and self.prefix_cache is not None:
+            # A single prompt can reuse a cached prefix; padded batches cannot, and go through the pipeline
+            i = pending[0]
+            with metrics.time('llm_generate_seconds', mode='single'):
+                results[i] = self._generate_one(prompts[i])
+            self._record_usage(prompts[i], results[i])
+            if self.cache is not None:
+                self.cache.put(self.model_path, params, prompts[i], results[i], embedding=embeddings[i])
+        elif pending:
+            with metrics.time('llm_generate_seconds', mode='batch'):
+                outputs = self.generator([prompts[i] for i in pending], batch_size=len(pending), **params)
+            metrics.inc('llm_batches_total')
+            metrics.inc('llm_batched_prompts_total', len(pending))
+            for i, output in zip(pending, outputs):
+                results[i] = output[0]['generated_text']
+                self._record_usage(prompts[i], results[i])
+                if self.cache is not None:
+                    self.cache.put(self.model_path, params, prompts[i], results[i], embedding=embeddings[i])
+        return results
+
+    def stream(self, prompt):
+        """
+        Yield the completion (without the prompt) in text chunks as tokens are generated, producing at most
+        max_tokens new tokens. Closing the generator early stops generation.
+        """
+        params = self.generation_params()  # same cache entries as generate()
+        embedding = None
+        if self.cache is not None:
+            cached, embedding = self.cache.get(self.model_path, params, prompt)
+            if cached is not None:
+                yield cached
+                return
+        from transformers import TextIteratorStreamer
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop = threading.Event()
+        errors = []
+
+        def generate(**kwargs):
+            try:
+                self.model.generate(**kwargs)
+            except BaseException as e:
+                # end the stream so the consumer is not left waiting; the error is raised there
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=generate, daemon=True, kwargs=dict(
+            **self._generate_inputs(prompt), streamer=streamer, stopping_criteria=stop_on_event(stop)))
+        thread.start()
+        chunks = []
+        finished = False
+        started = time.perf_counter()
+        try:
+            for chunk in streamer:
+                chunks.append(chunk)
+                yield chunk
+            if errors:
+                raise errors[0]
+            finished = True
+        finally:
+            stop.set()
+            thread.join()
+            metrics.observe('llm_generate_seconds', time.perf_counter() - started, mode='stream')
+            self._record_usage(prompt, ''.join(chunks))
+        # Only complete generations are cached; a stream closed early is a truncated completion
+        if finished and self.cache is not None:
+            self.cache.put(self.model_path, params, prompt, ''.join(chunks), embedding=embedding)
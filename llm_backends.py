@@ -0,0 +1,129 @@
+import argparse
+import os
+import sys
+import time
+
+BACKENDS = ('fp32', 'bf16', 'int8')
+
+
+def cpu_supports_bf16():
+    """True if the CPU has native bf16 instructions (AVX512-BF16 or AMX); elsewhere bf16 is emulated and slow."""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def configure_threads(num_threads=None, interop_threads=None, cpu_affinity=None):
+    """Pin the process to cpu_affinity (Linux) and set torch's intra-/inter-op thread counts."""
+    import torch
+    if cpu_affinity:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, set(cpu_affinity))
+        else:
+            print("[WARN] cpu_affinity is not supported on this platform; ignoring it")
+    if num_threads is None and cpu_affinity:
+        num_threads = len(cpu_affinity)
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Only allowed before the first parallel operation in the process
+            print("[WARN] interop_threads can only be set before torch starts parallel work; ignoring it")
+
+
+def load_dtype(backend):
+    """torch dtype to load weights in, so bf16 weights are never materialized in fp32 first."""
+    import torch
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if backend == 'bf16':
+        if not cpu_supports_bf16():
+            print("[WARN] CPU has no native bf16 support; the bf16 backend will be emulated and may be slower")
+        return torch.bfloat16
+    return torch.float32
+
+
+def apply_backend(model, backend, compile=False):
+    """
+    Prepare a loaded model for CPU inference:
+    - int8: dynamic quantization of nn.Linear layers (weights stored as int8, activations quantized on the fly).
+      Models built from other layer types (e.g. GPT-2's Conv1D) are left unchanged.
+    - compile: torch.compile the forward pass (dynamic shapes, so new prompt lengths do not recompile).
+    """
+    import torch
+    model.eval()
+    if backend == 'int8':
+        quantize_dynamic = getattr(torch, 'ao', torch).quantization.quantize_dynamic
+        model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)  # no second copy
+    if compile:
+        model.forward = torch.compile(model.forward, dynamic=True)
+    return model
+
+
+def parity_check(model_path, prompts, backend, max_new_tokens=32, compile=False, **thread_options):
+    """
+    Compare a backend against fp32 on the same prompts with greedy decoding. The reference model is freed
+    before the backend model is loaded. Reports top-1 next-token agreement over the prompt positions,
+    exact-match rate of the generated text, and mean generation latency for both.
+    """
+    import gc
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    configure_threads(**thread_options)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    encoded = [tokenizer(prompt, return_tensors='pt') for prompt in prompts]
+
+    def run(model):
+        predictions, texts, seconds = [], [], 0.0
+        with torch.no_grad():
+            for inputs in encoded:
+                predictions.append(model(**inputs).logits[0].argmax(-1))
+                started = time.perf_counter()
+                output = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False,
+                                        pad_token_id=tokenizer.pad_token_id)
+                seconds += time.perf_counter() - started
+                texts.append(tokenizer.decode(output[0, inputs['input_ids'].shape[1]:], skip_special_tokens=True))
+        return predictions, texts, seconds / len(encoded)
+
+    reference = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+    ref_predictions, ref_texts, ref_seconds = run(reference.eval())
+    del reference
+    gc.collect()
+    model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=load_dtype(backend), low_cpu_mem_usage=True)
+    predictions, texts, seconds = run(apply_backend(model, backend, compile=compile))
+    agreeing = sum(int((a == b).sum()) for a, b in zip(ref_predictions, predictions))
+    positions = sum(len(a) for a in ref_predictions)
+    return {
+        'backend': backend,
+        'compile': compile,
+        'top1_agreement': agreeing / positions if positions else 1.0,
+        'exact_match': sum(a == b for a, b in zip(ref_texts, texts)) / len(texts),
+        'fp32_seconds_per_prompt': round(ref_seconds, 4),
+        'backend_seconds_per_prompt': round(seconds, 4),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check an LLM backend's outputs against fp32")
+    parser.add_argument('--model', required=True, help='Model path or name')
+    parser.add_argument('--backend', choices=BACKENDS, default='int8')
+    parser.add_argument('--compile', action='store_true')
+    parser.add_argument('--threads', type=int)
+    parser.add_argument('--prompt', action='append', help='Prompt to compare (repeatable)')
+    parser.add_argument('--max-new-tokens', type=int, default=32)
+    parser.add_argument('--min-agreement', type=float, default=0.9,
+                        help='Exit with status 1 if top-1 agreement is below this')
+    args = parser.parse_args()
+    prompts = args.prompt or ["Objective: Plan a community garden\nGenerate a list of tasks to achieve the objective.",
+                              "Execute the following task: Research local soil conditions"]
+    report = parity_check(args.model, prompts, args.backend, max_new_tokens=args.max_new_tokens,
+                          compile=args.compile, num_threads=args.threads)
+    print(report)
+    sys.exit(0 if report['top1_agreement'] >= args.min_agreement else 1)
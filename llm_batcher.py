@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import Future
+from batch_queue import BatchQueue
+
+
+class BatchingLLM:
+    """
+    Dynamic micro-batching front end for an LLM. generate() calls from concurrent callers are queued and
+    every max_wait seconds (or once max_batch_size prompts are waiting) served by one LLM.generate_batch call.
+    Other attributes are forwarded to the wrapped LLM, so it can be passed wherever an LLM is expected.
+    """
+    def __init__(self, llm, max_batch_size=8, max_wait=0.02):
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = BatchQueue()
+        self.batches = 0
+        self.thread = threading.Thread(target=self._run, name='llm-batcher', daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def submit(self, prompt):
+        future = Future()
+        self.queue.put((prompt, future))
+        return future
+
+    def generate(self, prompt):
+        return self.submit(prompt).result()
+
+    def stream(self, prompt):
+        # Batched generation is not incremental; yield the whole completion once it is ready
+        yield self.generate(prompt)
+
+    def generate_batch(self, prompts):
+        return [f.result() for f in [self.submit(p) for p in prompts]]
+
+    def _run(self):
+        while True:
+            items, stop = self.queue.next_batch(self.max_batch_size, self.max_wait)
+            if items:
+                try:
+                    outputs = self.llm.generate_batch([prompt for prompt, _ in items])
+                    self.batches += 1
+                    for (_, future), output in zip(items, outputs):
+                        future.set_result(output)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.close()
+            self.thread.join()
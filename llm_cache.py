@@ -0,0 +1,132 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of LLM completions keyed on (model path, generation params, prompt).
+    Entries expire after ttl_seconds and the least recently used ones are evicted beyond max_entries.
+    In semantic mode (requires an embed callable) a miss falls back to the cached prompt with the most
+    similar embedding, if its cosine similarity is at least semantic_threshold.
+    """
+    def __init__(self, path='llm_cache.sqlite', max_entries=5000, ttl_seconds=None, semantic=False,
+                 semantic_threshold=0.95, embed=None):
+        if semantic and embed is None:
+            raise ValueError("Semantic LLM caching requires an embed function")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic = semantic
+        self.semantic_threshold = semantic_threshold
+        self.embed = embed
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.semantic_index = {}  # namespace -> (keys, unit-length embedding matrix)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, namespace TEXT, response TEXT, "
+            "created REAL, accessed REAL, embedding BLOB)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.db.commit()
+
+    @staticmethod
+    def namespace(model_path, params):
+        return hashlib.sha256(json.dumps([model_path, params], sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def key(namespace, prompt):
+        return hashlib.sha256(f"{namespace}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def _fresh(self, created):
+        return self.ttl_seconds is None or time.time() - created <= self.ttl_seconds
+
+    def _lookup(self, key):
+        row = self.db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or not self._fresh(row[1]):
+            return None
+        self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return row[0]
+
+    def _semantic_entries(self, namespace):
+        if namespace not in self.semantic_index:
+            rows = self.db.execute(
+                "SELECT key, embedding FROM responses WHERE namespace = ? AND embedding IS NOT NULL",
+                (namespace,)).fetchall()
+            keys = [k for k, _ in rows]
+            matrix = np.array([np.frombuffer(e, dtype=np.float32) for _, e in rows], dtype=np.float32)
+            self.semantic_index[namespace] = (keys, matrix)
+        return self.semantic_index[namespace]
+
+    def _unit_embedding(self, prompt):
+        vector = np.asarray(self.embed(prompt), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) + 1e-8)
+
+    def get(self, model_path, params, prompt):
+        """Return (response, embedding); embedding is the prompt's embedding computed for semantic lookup, if any."""
+        namespace = self.namespace(model_path, params)
+        with self.lock:
+            response = self._lookup(self.key(namespace, prompt))
+            if response is not None:
+                self.hits += 1
+                return response, None
+            embedding = None
+            if self.semantic:
+                embedding = self._unit_embedding(prompt)
+                keys, matrix = self._semantic_entries(namespace)
+                if keys:
+                    scores = matrix @ embedding
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.semantic_threshold:
+                        response = self._lookup(keys[best])
+                        if response is not None:
+                            self.semantic_hits += 1
+                            return response, embedding
+            self.misses += 1
+            return None, embedding
+
+    def put(self, model_path, params, prompt, response, embedding=None):
+        namespace = self.namespace(model_path, params)
+        key = self.key(namespace, prompt)
+        now = time.time()
+        with self.lock:
+            if self.semantic and embedding is None:
+                embedding = self._unit_embedding(prompt)
+            blob = embedding.astype(np.float32).tobytes() if embedding is not None else None
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, namespace, response, created, accessed, embedding) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (key, namespace, response, now, now, blob))
+            if embedding is not None and namespace in self.semantic_index:
+                keys, matrix = self.semantic_index[namespace]
+                matrix = np.vstack([matrix.reshape(-1, embedding.shape[0]), embedding[np.newaxis, :]])
+                self.semantic_index[namespace] = (keys + [key], matrix)
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        evicted = 0
+        if self.ttl_seconds is not None:
+            evicted += self.db.execute("DELETE FROM responses WHERE created < ?",
+                                       (time.time() - self.ttl_seconds,)).rowcount
+        count = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            evicted += self.db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,)).rowcount
+        if evicted:
+            # Evicted keys may still be in the semantic index; rebuild it lazily on the next lookup
+            self.semantic_index.clear()
+
+    def stats(self):
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            'hits': self.hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+        }
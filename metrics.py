@@ -0,0 +1,189 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = 'babyagi_'
+# Upper bounds in seconds: from a cached tool call up to a long CPU generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Upper bounds for item counts, such as batch sizes
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Histogram:
+    """Bucketed distribution of observed values, with their count, sum and maximum."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the maximum for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 6),
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms, labelled Prometheus-style, plus collectors: callables returning
+    [(name, labels, value), ...] gauges that are read when metrics are exported (cache hit rates, queue depths).
+    prometheus() renders the text exposition format; snapshot() a JSON-serializable dict with a per-stage
+    breakdown of where the time went.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = []
+        self.buckets = {}  # histogram name -> bucket bounds, if not DEFAULT_BUCKETS
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_buckets(self, name, buckets):
+        """Bucket bounds for the histograms named name that are created from now on."""
+        with self.lock:
+            self.buckets[name] = tuple(buckets)
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Observe the seconds spent in the block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def add_collector(self, collect):
+        with self.lock:
+            self.collectors.append(collect)
+
+    def gauges(self):
+        values = {}
+        for collect in list(self.collectors):
+            try:
+                for name, labels, value in collect():
+                    values[_key(name, labels)] = value
+            except Exception as e:
+                print(f"[WARN] Metrics collector failed: {e}")
+        return values
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def counter(self, name, **labels):
+        with self.lock:
+            return self.counters.get(_key(name, labels), 0)
+
+    def histogram(self, name, **labels):
+        with self.lock:
+            histogram = self.histograms.get(_key(name, labels))
+            return histogram.summary() if histogram is not None else Histogram().summary()
+
+    def total(self, name):
+        """Sum of a counter, or of a histogram's observations, over all label values."""
+        with self.lock:
+            if any(key[0] == name for key in self.histograms):
+                return sum(h.sum for key, h in self.histograms.items() if key[0] == name)
+            return sum(v for key, v in self.counters.items() if key[0] == name)
+
+    def snapshot(self):
+        gauges = self.gauges()
+        with self.lock:
+            counters = {name + _label_text(labels): value for (name, labels), value in self.counters.items()}
+            histograms = {name + _label_text(labels): h.summary() for (name, labels), h in self.histograms.items()}
+            stages = {dict(labels).get('stage'): h.sum for (name, labels), h in self.histograms.items()
+                      if name == 'stage_seconds'}
+        stage_total = sum(stages.values())
+        generate_seconds = self.total('llm_generate_seconds')
+        return {
+            'counters': counters,
+            'histograms': histograms,
+            'gauges': {name + _label_text(labels): value for (name, labels), value in gauges.items()},
+            'stage_share': {stage: round(seconds / stage_total, 4) for stage, seconds in
+                            sorted(stages.items(), key=lambda item: -item[1])} if stage_total else {},
+            'llm_tokens_per_sec': round(self.total('llm_completion_tokens_total') / generate_seconds, 2)
+            if generate_seconds else 0.0,
+        }
+
+    def prometheus(self):
+        gauges = self.gauges()
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            typed = set()
+            for (name, labels), value in counters:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {PREFIX}{name} counter')
+                lines.append(f'{PREFIX}{name}{_label_text(labels)} {value}')
+            for (name, labels), histogram in histograms:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {PREFIX}{name} histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{PREFIX}{name}_bucket{_label_text(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{PREFIX}{name}_sum{_label_text(labels)} {histogram.sum}')
+                lines.append(f'{PREFIX}{name}_count{_label_text(labels)} {histogram.count}')
+        for (name, labels), value in sorted(gauges.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {PREFIX}{name} gauge')
+            lines.append(f'{PREFIX}{name}{_label_text(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry that the agent components record into
+registry = MetricsRegistry()
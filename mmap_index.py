@@ -0,0 +1,148 @@
+import atexit
+import json
+import os
+import numpy as np
+from vector_store import normalize_rows, top_k_rows
+
+
+class MmapIndex:
+    """
+    Disk-backed exact cosine-similarity index that survives restarts.
+    Layout of the store directory:
+      header.json  - {"dim": N}
+      vectors.f32  - append-only raw float32 rows, pre-normalized
+      meta.jsonl   - one {"id": ..., "metadata": ...} line per row
+      offsets.i64  - raw int64 byte offset of each row's line in meta.jsonl
+    Opening a store only reads the header and file sizes, so startup cost does not depend on store size.
+    Vectors are read through numpy.memmap and scanned in chunks, and metadata is loaded only for hits,
+    so memory stays bounded. add is an append; files are fsynced every fsync_every adds and on close.
+    Task ids are expected to be unique (TaskManager uses uuid4); re-adding an id appends a new row.
+    """
+    def __init__(self, path='vector_store_data', fsync_every=64, chunk_rows=65536):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.chunk_rows = chunk_rows
+        os.makedirs(path, exist_ok=True)
+        self.header_path = os.path.join(path, 'header.json')
+        self.vectors_path = os.path.join(path, 'vectors.f32')
+        self.meta_path = os.path.join(path, 'meta.jsonl')
+        self.offsets_path = os.path.join(path, 'offsets.i64')
+        self.dim = None
+        if os.path.exists(self.header_path):
+            with open(self.header_path, 'r') as f:
+                self.dim = json.load(f)['dim']
+        self.size = self._rows_on_disk()
+        self._vectors_file = None
+        self._meta_file = None
+        self._offsets_file = None
+        self._meta_reader = None
+        self._mapped = None
+        self._mapped_offsets = None
+        self._unsynced = 0
+        atexit.register(self.close)
+
+    def __len__(self):
+        return self.size
+
+    def _rows_on_disk(self):
+        # A crash can leave a partially written row; only rows present in both files count.
+        if self.dim is None or not os.path.exists(self.vectors_path) or not os.path.exists(self.offsets_path):
+            return 0
+        vector_rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        offset_rows = os.path.getsize(self.offsets_path) // 8
+        return min(vector_rows, offset_rows)
+
+    def _open_for_append(self):
+        if self._vectors_file is not None:
+            return
+        # Drop any torn tail left by a crash so rows stay aligned across files
+        for path, row_bytes in ((self.vectors_path, self.dim * 4), (self.offsets_path, 8)):
+            if os.path.exists(path) and os.path.getsize(path) != self.size * row_bytes:
+                with open(path, 'r+b') as f:
+                    f.truncate(self.size * row_bytes)
+        self._vectors_file = open(self.vectors_path, 'ab')
+        self._meta_file = open(self.meta_path, 'ab')
+        self._offsets_file = open(self.offsets_path, 'ab')
+
+    def add(self, task_id, embedding, metadata):
+        vector = normalize_rows(embedding)[0]
+        if self.dim is None:
+            self.dim = int(vector.shape[0])
+            with open(self.header_path, 'w') as f:
+                json.dump({'dim': self.dim}, f)
+        elif vector.shape[0] != self.dim:
+            raise ValueError(f"Embedding dimension {vector.shape[0]} does not match index dimension {self.dim}")
+        self._open_for_append()
+        # Metadata first, then its offset, then the vector: a row only counts once its vector is written.
+        offset = self._meta_file.seek(0, os.SEEK_END)
+        self._meta_file.write((json.dumps({'id': task_id, 'metadata': metadata}) + '\n').encode('utf-8'))
+        self._offsets_file.write(np.int64(offset).tobytes())
+        self._vectors_file.write(vector.tobytes())
+        self.size += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def flush(self):
+        for f in (self._meta_file, self._offsets_file, self._vectors_file):
+            if f is not None:
+                f.flush()
+
+    def sync(self):
+        self.flush()
+        for f in (self._meta_file, self._offsets_file, self._vectors_file):
+            if f is not None:
+                os.fsync(f.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if self._vectors_file is not None:
+            self.sync()
+            for f in (self._meta_file, self._offsets_file, self._vectors_file):
+                f.close()
+            self._vectors_file = self._meta_file = self._offsets_file = None
+        if self._meta_reader is not None:
+            self._meta_reader.close()
+            self._meta_reader = None
+
+    def _vectors(self):
+        self.flush()
+        if self._mapped is None or self._mapped.shape[0] != self.size:
+            self._mapped = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(self.size, self.dim))
+        return self._mapped
+
+    def _lookup(self, row):
+        if self._mapped_offsets is None or self._mapped_offsets.shape[0] != self.size:
+            self._mapped_offsets = np.memmap(self.offsets_path, dtype=np.int64, mode='r', shape=(self.size,))
+        if self._meta_reader is None:
+            self._meta_reader = open(self.meta_path, 'rb')
+        self._meta_reader.seek(int(self._mapped_offsets[row]))
+        record = json.loads(self._meta_reader.readline())
+        return record['id'], record['metadata']
+
+    def query(self, embedding, top_k=3):
+        return self.query_many([embedding], top_k=top_k)[0]
+
+    def query_many(self, embeddings, top_k=3):
+        queries = normalize_rows(embeddings)
+        if self.size == 0:
+            return [[] for _ in range(len(queries))]
+        vectors = self._vectors()
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, self.size, self.chunk_rows):
+            chunk_scores = queries @ vectors[start:start + self.chunk_rows].T
+            chunk_rows = np.arange(start, start + chunk_scores.shape[1])
+            scores = np.concatenate([best_scores, chunk_scores], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(chunk_rows, chunk_scores.shape)], axis=1)
+            keep = top_k_rows(scores, top_k)
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_rows = np.take_along_axis(rows, keep, axis=1)
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            hits = []
+            for score, row in zip(scores, rows):
+                task_id, metadata = self._lookup(int(row))
+                hits.append((float(score), task_id, metadata))
+            results.append(hits)
+        return results
@@ -0,0 +1,95 @@
+import copy
+import threading
+from collections import OrderedDict
+
+
+def cache_nbytes(past_key_values):
+    """Bytes held by a transformers KV cache (Cache object or legacy tuple of (key, value) per layer)."""
+    if hasattr(past_key_values, 'layers'):
+        tensors = [t for layer in past_key_values.layers for t in (layer.keys, layer.values) if t is not None]
+    else:
+        if hasattr(past_key_values, 'to_legacy_cache'):
+            past_key_values = past_key_values.to_legacy_cache()
+        tensors = [t for layer in past_key_values for t in layer]
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class PrefixCache:
+    """
+    KV states (past_key_values) of registered prompt prefixes, so generation only prefills the rest of the prompt.
+    Prefixes are registered as token ids; match() finds the longest one a prompt starts with. States are kept
+    in an LRU bounded by max_bytes of tensor memory. get() returns a copy, since generation extends the cache
+    in place.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_prefixes=64):
+        self.max_bytes = max_bytes
+        self.max_prefixes = max_prefixes
+        self.prefixes = OrderedDict()  # token ids -> None, most recently registered last
+        self.entries = OrderedDict()   # token ids -> (past_key_values, nbytes)
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+    def register(self, ids):
+        ids = tuple(ids)
+        if not ids:
+            return
+        with self.lock:
+            self.prefixes[ids] = None
+            self.prefixes.move_to_end(ids)
+            while len(self.prefixes) > self.max_prefixes:
+                dropped, _ = self.prefixes.popitem(last=False)
+                self._drop(dropped)
+
+    def match(self, ids):
+        """The longest registered prefix of ids that leaves at least one token to prefill, or None."""
+        with self.lock:
+            best = None
+            for prefix in self.prefixes:
+                if len(prefix) < len(ids) and (best is None or len(prefix) > len(best)) \
+                        and tuple(ids[:len(prefix)]) == prefix:
+                    best = prefix
+            return best
+
+    def get(self, prefix):
+        with self.lock:
+            entry = self.entries.get(prefix)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(prefix)
+            self.hits += 1
+            self.reused_tokens += len(prefix)
+            past_key_values = entry[0]
+        return copy.deepcopy(past_key_values)
+
+    def put(self, prefix, past_key_values):
+        nbytes = cache_nbytes(past_key_values)
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            self._drop(prefix)
+            self.entries[prefix] = (past_key_values, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._drop(oldest)
+
+    def _drop(self, prefix):
+        entry = self.entries.pop(prefix, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'prefixes': len(self.prefixes),
+            'entries': len(self.entries),
+            'bytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'reused_tokens': self.reused_tokens,
+        }
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class PromptBuilder:
+    """
+    Packs context into prompts under a token budget, counting with the LLM's own tokenizer
+    (LLM.count_tokens / truncate_tokens; about four characters per token for LLMs without them).
+    - pack() adds context records in the order given (most relevant first) while they fit in context_tokens
+      and in what the model context window leaves after the rest of the prompt and max_tokens new tokens.
+    - A result longer than max_result_tokens is cut to that length, or with compress='summarize' replaced by an
+      LLM summary. Summaries are cached (LRU of summary_cache_size) so a result is only summarized once.
+    """
+    def __init__(self, llm=None, context_tokens=1024, max_result_tokens=256, compress='truncate',
+                 summary_cache_size=256, summary_input_tokens=1024):
+        if compress not in ('truncate', 'summarize'):
+            raise ValueError(f"Unknown compress mode '{compress}'")
+        self.llm = llm
+        self.context_tokens = context_tokens
+        self.max_result_tokens = max_result_tokens
+        self.compress = compress
+        self.summary_cache_size = summary_cache_size
+        self.summary_input_tokens = summary_input_tokens
+        self.summaries = OrderedDict()
+        self.lock = threading.Lock()
+        self.truncated = 0
+        self.summarized = 0
+        self.summary_hits = 0
+        self.dropped = 0
+
+    def count(self, text):
+        count_tokens = getattr(self.llm, 'count_tokens', None)
+        if count_tokens is None:
+            return (len(text) + 3) // 4
+        return count_tokens(text)
+
+    def truncate(self, text, max_tokens):
+        truncate_tokens = getattr(self.llm, 'truncate_tokens', None)
+        if truncate_tokens is None:
+            return text[:max_tokens * 4]
+        return truncate_tokens(text, max_tokens)
+
+    def budget(self, fixed_text=''):
+        """Tokens available for context in a prompt whose other parts are fixed_text."""
+        budget = self.context_tokens
+        window = getattr(self.llm, 'context_window', None)
+        if window:
+            budget = min(budget, window - self.llm.max_tokens - self.count(fixed_text))
+        return max(budget, 0)
+
+    def _summary(self, text, max_tokens):
+        key = (hashlib.sha1(text.encode('utf-8')).hexdigest(), max_tokens)
+        with self.lock:
+            if key in self.summaries:
+                self.summaries.move_to_end(key)
+                self.summary_hits += 1
+                return self.summaries[key]
+        source = self.truncate(text, self.summary_input_tokens)
+        summary = self.llm.generate(f"Summarize the following in at most {max_tokens} tokens, keeping facts, "
+                                    f"numbers and names:\n{source}\nSummary:").strip()
+        summary = self.truncate(summary, max_tokens)
+        with self.lock:
+            self.summaries[key] = summary
+            self.summarized += 1
+            while len(self.summaries) > self.summary_cache_size:
+                self.summaries.popitem(last=False)
+        return summary
+
+    def fit(self, text, max_tokens):
+        """text itself if it has at most max_tokens tokens, otherwise its summary or truncation."""
+        if self.count(text) <= max_tokens:
+            return text
+        if self.compress == 'summarize' and self.llm is not None:
+            return self._summary(text, max_tokens)
+        self.truncated += 1
+        return self.truncate(text, max_tokens) + ' [...]'
+
+    def pack(self, records, fixed_text=''):
+        """'Task: ...\\nResult: ...' blocks for the records that fit the budget, most relevant first."""
+        remaining = self.budget(fixed_text)
+        blocks = []
+        for record in records:
+            block = f"Task: {record['task']}\nResult: {self.fit(record['result'], self.max_result_tokens)}"
+            tokens = self.count(block) + 1  # joining newline
+            if tokens > remaining:
+                self.dropped += 1
+                continue
+            blocks.append(block)
+            remaining -= tokens
+        return "\n".join(blocks)
+
+    def stats(self):
+        return {
+            'truncated': self.truncated,
+            'summarized': self.summarized,
+            'summary_hits': self.summary_hits,
+            'dropped': self.dropped,
+        }
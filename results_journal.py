@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+
+
+class ResultsJournal:
+    """
+    Append-only JSONL journal of completed task records.
+    - append writes one line and fsyncs every sync_every appends; a torn last line left by a crash
+      is cut off when the journal is next opened, and unreadable lines are skipped when reading.
+    - Iterating streams records from disk, and tail(n) reads only the end of the file, so opening a
+      journal never loads its history into memory.
+    - compact rewrites the file atomically without unreadable lines and, if max_records is set, keeping only
+      the newest max_records records. It runs every compact_every appends when there is something to drop.
+    - An existing results.json (legacy_path) is migrated on first open and renamed to results.json.migrated.
+    """
+    def __init__(self, path='results.jsonl', legacy_path=None, sync_every=1, max_records=None, compact_every=1000):
+        self.path = path
+        self.sync_every = sync_every
+        self.max_records = max_records
+        self.compact_every = compact_every
+        self.lock = threading.RLock()
+        self.count = None  # number of records, counted lazily
+        self.corrupt = 0   # unreadable lines seen while reading
+        self.unsynced = 0
+        self.since_compaction = 0
+        if legacy_path and os.path.exists(legacy_path) and not os.path.exists(path):
+            self.migrate(legacy_path)
+        self._repair_tail()
+        self.file = open(path, 'ab')
+
+    def migrate(self, legacy_path):
+        with open(legacy_path, 'r') as f:
+            records = json.load(f)
+        self._write_atomically(records)
+        os.replace(legacy_path, legacy_path + '.migrated')
+
+    def _repair_tail(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Find the last complete line and drop the partial append after it
+            position = size
+            while position > 0:
+                start = max(0, position - 65536)
+                f.seek(start)
+                block = f.read(position - start)
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    return
+                position = start
+            f.truncate(0)
+
+    def _write_atomically(self, records):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def append(self, record):
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every:
+                self.sync()
+            if self.count is not None:
+                self.count += 1
+            self.since_compaction += 1
+            if self.compact_every and self.since_compaction >= self.compact_every:
+                self.compact()
+
+    def sync(self):
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def __iter__(self):
+        with self.lock:
+            self.file.flush()
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    self.corrupt += 1
+
+    def __len__(self):
+        """Number of readable records, the ones iteration and tail() return."""
+        with self.lock:
+            if self.count is None:
+                self.file.flush()
+                count = corrupt = 0
+                with open(self.path, 'rb') as f:
+                    for line in f:
+                        try:
+                            json.loads(line)
+                            count += 1
+                        except ValueError:
+                            corrupt += 1
+                self.count = count
+                self.corrupt = max(self.corrupt, corrupt)
+            return self.count
+
+    def tail(self, n):
+        """The last n readable records, oldest first, read backwards from the end of the file."""
+        if n <= 0:
+            return []
+        with self.lock:
+            self.file.flush()
+        records = []
+        with open(self.path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            partial = b''  # start of the line that continues into the block read before
+            while position > 0 and len(records) < n:
+                start = max(0, position - 65536)
+                f.seek(start)
+                lines = (f.read(position - start) + partial).split(b'\n')
+                position = start
+                partial = lines.pop(0) if start > 0 else b''
+                for line in reversed(lines):
+                    if len(records) == n:
+                        break
+                    if line.strip():
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            continue
+        return records[::-1]
+
+    def compact(self):
+        with self.lock:
+            self.since_compaction = 0
+            total = len(self)
+            if not self.corrupt and (self.max_records is None or total <= self.max_records):
+                return
+            records = list(self)
+            if self.max_records is not None:
+                records = records[-self.max_records:]
+            self.file.close()
+            self._write_atomically(records)
+            self.count = len(records)
+            self.corrupt = 0
+            self.file = open(self.path, 'ab')
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.sync()
+                self.file.close()
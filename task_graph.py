@@ -0,0 +1,137 @@
+import re
+
+NUMBERED_PATTERN = re.compile(r'^\s*(?:task\s*)?(\d+)\s*[.):-]\s*(.+)$', re.IGNORECASE)
+DEPENDS_PATTERN = re.compile(r'[(\[]\s*(?:depends on|after|requires)\s*:?\s*([^)\]]*)[)\]]', re.IGNORECASE)
+REFERENCE_PATTERN = re.compile(r'\b(?:task|step)\s*#?(\d+)\b', re.IGNORECASE)
+
+
+def parse_task_graph(text):
+    """
+    Parse LLM task output into [(task_id, task, deps)]. Lines may be numbered ("3. Compare ...") and annotated
+    with "(depends on: 1, 2)"; without an annotation, dependencies are inferred from references such as
+    "using the results of task 2". If any line is numbered, unnumbered lines (preambles such as "Here are the
+    tasks:", trailing prose) are dropped, as is a repeated number; otherwise every line is a task, numbered in order.
+    """
+    lines = [line for line in text.split('\n') if line.strip()]
+    matches = [NUMBERED_PATTERN.match(line) for line in lines]
+    numbered = any(matches)
+    entries = []
+    seen = set()
+    for n, (line, match) in enumerate(zip(lines, matches), 1):
+        if match:
+            task_id, task = match.group(1), match.group(2)
+        elif numbered:
+            continue
+        else:
+            task_id, task = str(n), line.strip()
+        if task_id in seen:
+            continue
+        seen.add(task_id)
+        annotation = DEPENDS_PATTERN.search(task)
+        if annotation:
+            deps = re.findall(r'\d+', annotation.group(1))
+            task = (task[:annotation.start()] + task[annotation.end():]).strip()
+        else:
+            deps = REFERENCE_PATTERN.findall(task)
+        entries.append((task_id, task, [d for d in dict.fromkeys(deps) if d != task_id]))
+    return entries
+
+
+class TaskGraph:
+    """
+    Dependency graph of tasks. A task is ready once every task it depends on has completed; dependencies on
+    unknown ids are ignored. Cycles are found with Kahn's algorithm, and break_cycles drops the edges between
+    the tasks involved so they can still run.
+    """
+    def __init__(self):
+        self.tasks = {}       # task_id -> task text
+        self.deps = {}        # task_id -> set of task_ids it waits for
+        self.dependents = {}  # task_id -> set of task_ids waiting for it
+        self.results = {}     # task_id -> result of completed tasks
+        self.started = set()
+        self.skipped = set()
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, task_id, task, deps=()):
+        self.tasks[task_id] = task
+        self.deps[task_id] = set()
+        self.dependents.setdefault(task_id, set())
+        for dep in deps:
+            self.add_dependency(task_id, dep)
+
+    def add_dependency(self, task_id, dep):
+        self.deps[task_id].add(dep)
+        self.dependents.setdefault(dep, set()).add(task_id)
+
+    def _known_deps(self, task_id):
+        return {d for d in self.deps[task_id] if d in self.tasks}
+
+    def find_cycles(self):
+        """Ids of tasks on or behind a dependency cycle (empty if the graph is acyclic)."""
+        indegree = {t: len(self._known_deps(t)) for t in self.tasks}
+        queue = [t for t, n in indegree.items() if n == 0]
+        while queue:
+            task_id = queue.pop()
+            for dependent in self.dependents.get(task_id, ()):
+                if dependent in indegree:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        queue.append(dependent)
+        return {t for t, n in indegree.items() if n > 0}
+
+    def break_cycles(self):
+        cyclic = self.find_cycles()
+        for task_id in cyclic:
+            for dep in self.deps[task_id] & cyclic:
+                self.dependents[dep].discard(task_id)
+            self.deps[task_id] -= cyclic
+        return cyclic
+
+    def ready(self):
+        """Tasks not yet started whose known dependencies have all completed, in insertion order."""
+        return [t for t in self.tasks
+                if t not in self.started and t not in self.skipped
+                and all(d in self.results for d in self._known_deps(t))]
+
+    def start(self, task_id):
+        self.started.add(task_id)
+        return self.tasks[task_id]
+
+    def dependency_results(self, task_id):
+        return [{'task': self.tasks[d], 'result': self.results[d]}
+                for d in sorted(self._known_deps(task_id)) if d in self.results]
+
+    def complete(self, task_id, result):
+        self.results[task_id] = result
+
+    def fail(self, task_id):
+        """Mark everything that (transitively) depends on a failed task as skipped; returns the skipped ids."""
+        skipped = []
+        stack = list(self.dependents.get(task_id, ()))
+        while stack:
+            dependent = stack.pop()
+            if dependent in self.tasks and dependent not in self.skipped and dependent not in self.started:
+                self.skipped.add(dependent)
+                skipped.append(dependent)
+                stack.extend(self.dependents.get(dependent, ()))
+        return skipped
+
+    def to_dict(self):
+        """JSON-serializable state for checkpoints; tasks that were still running are not marked started."""
+        return {'tasks': dict(self.tasks), 'deps': {t: sorted(d) for t, d in self.deps.items()},
+                'results': dict(self.results), 'skipped': sorted(self.skipped)}
+
+    @classmethod
+    def from_dict(cls, data):
+        graph = cls()
+        for task_id, task in data['tasks'].items():
+            graph.add(task_id, task, data['deps'].get(task_id, ()))
+        graph.results = dict(data['results'])
+        graph.started = set(graph.results)
+        graph.skipped = set(data['skipped'])
+        return graph
+
+    def pending(self):
+        return len(self.tasks) - len(self.started) - len(self.skipped)
@@ -1,94 +1,463 @@
 import uuid
-import json
-import os
-from tool_registry import call_tool
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from tool_executor import default_executor, parse_tool_calls
+from results_journal import ResultsJournal
+from agent_log import AgentLog
+from task_scheduler import TaskScheduler
+from task_graph import TaskGraph, parse_task_graph
+from prompt_builder import PromptBuilder
+from metrics import registry as metrics
+
+FEEDBACK_HEADER = "Reflect on the result of the following task and suggest improvements or follow-up tasks.\n"
 
 class TaskManager:
     """
     TaskManager handles task generation, prioritization, execution, feedback, logging, and pluggable tool use.
     If the LLM result contains 'TOOL: tool_name: arg', the tool is called and its output appended to the result.
     """
-    def __init__(self, llm, vector_store, max_tasks=10, log_file='output.log', results_file='results.json'):
+    def __init__(self, llm, vector_store, max_tasks=10, log_file='output.log', results_file='results.jsonl',
+                 embedding_worker=None, context_top_k=5, stream_output=True, tool_executor=None,
+                 legacy_results_file='results.json', memory_size=100, journal_options=None, logger=None,
+                 prioritization='relevance', scheduler_options=None, checkpoint=None, prompt_builder=None,
+                 namespace=None):
         self.llm = llm
+        self.tool_executor = tool_executor if tool_executor is not None else default_executor()
+        self.stream_output = stream_output
         self.vector_store = vector_store
+        self.embedding_worker = embedding_worker
+        self.context_top_k = context_top_k
+        self.namespace = namespace
         self.max_tasks = max_tasks
-        self.tasks = []
-        self.completed = []  # List of dicts: {task, result}
-        self.memory = []     # Store all results for context
+        if prioritization not in ('relevance', 'fifo'):
+            raise ValueError(f"Unknown prioritization '{prioritization}'")
+        embed = (lambda texts: self.vector_store.embed_many(texts)) if prioritization == 'relevance' else None
+        self.tasks = TaskScheduler(embed=embed, max_size=max_tasks, **(scheduler_options or {}))
         self.log_file = log_file
+        self.logger = logger if logger is not None else AgentLog(log_file)
         self.results_file = results_file
-        if os.path.exists(self.results_file):
-            with open(self.results_file, 'r') as f:
-                self.completed = json.load(f)
-                self.memory = self.completed.copy()
+        self.memory_size = memory_size
+        self.lock = threading.RLock()  # guards tasks, completed, memory and the results journal
+        if results_file is None:
+            self.completed = []  # List of dicts: {task, result}
+            self.memory = []
+        else:
+            self.completed = ResultsJournal(results_file, legacy_path=legacy_results_file, **(journal_options or {}))
+            self.memory = self.completed.tail(memory_size)  # newest results, kept for context
+        self.checkpoint = checkpoint
+        self.listeners = []
+        self.stop_requested = threading.Event()
+        self.prompt_builder = prompt_builder if prompt_builder is not None else PromptBuilder(llm)
+        self.objective = None
+        self.graph = None
+        self.running = []  # tasks being executed
+        # Results are numbered in journal order; every result below embedded_results is in the vector store
+        self.result_count = len(self.completed) if checkpoint is not None else 0
+        self.embedded_results = self.result_count
+        self.stored_ahead = set()  # stored results numbered above the watermark
+
+    def log(self, event, message='', level='INFO', **fields):
+        """Record a structured event (GENERATE_TASKS, TOOL_USE, FEEDBACK, ...); writing happens in the background."""
+        self.logger.event(event, message, level=level, **fields)
+        for listener in self.listeners:
+            try:
+                listener(dict(fields, event=event, message=message, level=level))
+            except Exception as e:
+                print(f"[WARN] Event listener failed: {e}")
 
-    def log(self, message):
-        with open(self.log_file, 'a') as f:
-            f.write(message + '\n')
+    def add_listener(self, callback):
+        """Call callback({'event', 'message', 'level', ...fields}) for every event, at any log level."""
+        self.listeners.append(callback)
+
+    def request_stop(self):
+        """Stop starting new tasks; the run returns once the tasks already executing have finished."""
+        self.stop_requested.set()
+        self.log('STOP_REQUESTED')
 
     def save_results(self):
-        with open(self.results_file, 'w') as f:
-            json.dump(self.completed, f, indent=2)
+        # Records are appended to the journal as tasks complete; this only forces them to disk
+        if self.results_file is not None:
+            self.completed.sync()
+
+    def store_result(self, task, result, number=None):
+        """Embed a result into the vector store (in the background with an EmbeddingWorker), under the namespace."""
+        text = f"Task: {task}\nResult: {result}"
+        metadata = {"task": task, "result": result}
+        if self.namespace is not None:
+            metadata['namespace'] = self.namespace
+        task_id = str(uuid.uuid4())
+        on_stored = (lambda: self._mark_stored(number)) if number is not None else None
+        if self.embedding_worker is not None:
+            self.embedding_worker.submit(task_id, text, metadata, on_stored=on_stored)
+        else:
+            self.vector_store.add_task(task_id, self.vector_store.embed_text(text), metadata)
+            if on_stored is not None:
+                on_stored()
+
+    def _mark_stored(self, number):
+        # Results can be stored out of order; the watermark only advances over a contiguous prefix
+        with self.lock:
+            self.stored_ahead.add(number)
+            while self.embedded_results in self.stored_ahead:
+                self.stored_ahead.remove(self.embedded_results)
+                self.embedded_results += 1
+
+    def state(self):
+        """JSON-serializable snapshot of everything needed to continue the run."""
+        with self.lock:
+            return {
+                'objective': self.objective,
+                'tasks': self.tasks.snapshot(),
+                'running': list(self.running),
+                'graph': self.graph.to_dict() if self.graph is not None else None,
+                'results': self.result_count,
+                'embedded': self.embedded_results,
+            }
+
+    def save_checkpoint(self, force=False):
+        """
+        Save the run's state, at most once per checkpoint interval unless forced. A forced save (end of a run,
+        Ctrl-C) first waits for queued results to reach the vector store, so --resume does not re-embed them.
+        """
+        if self.checkpoint is not None:
+            if force and self.embedding_worker is not None:
+                self.embedding_worker.flush()
+            self.checkpoint.save(self.state(), force=force)
+
+    def restore(self, state):
+        """
+        Continue from a checkpoint: restore the queue, objective and DAG, queue the tasks that were running
+        first, and re-embed journal records that had not reached the vector store. An in-memory index (local, ivf)
+        did not outlive the previous process, so the whole journal is embedded again.
+        """
+        running = state['running'] if not state.get('graph') else []
+        running_vectors = self.tasks.embed_texts(running)  # embedded before taking the lock
+        with self.lock:
+            self.objective = state['objective']
+            self.tasks.restore(state['tasks'])
+            self.graph = TaskGraph.from_dict(state['graph']) if state.get('graph') else None
+            # A restored graph re-runs its unfinished tasks itself
+            if running:
+                self.tasks.extend(running, priority=TaskScheduler.URGENT, vectors=running_vectors, force=True)
+            total = len(self.completed)
+            if getattr(self.vector_store, 'persistent', True):
+                # A journal compacted since the checkpoint has fewer records; those it kept were already stored
+                self.embedded_results = min(state['embedded'], total)
+            else:
+                self.embedded_results = 0
+            self.result_count = total
+            self.stored_ahead = set()
+            if self.results_file is None:
+                missing = []
+            elif self.embedded_results == 0:
+                missing = iter(self.completed)  # streamed rather than read into memory at once
+            else:
+                missing = self.completed.tail(total - self.embedded_results)
+            reembedded = total - self.embedded_results if self.results_file is not None else 0
+        if self.objective:
+            self.register_prompt_prefixes(self.objective)
+        for number, record in enumerate(missing, self.embedded_results):
+            self.store_result(record['task'], record['result'], number)
+        self.log('RESTORE', objective=self.objective, tasks=len(self.tasks), running=len(state['running']),
+                 reembedded=reembedded)
+
+    def retrieve_context(self, objective):
+        """
+        Top-k stored results most similar to the objective, falling back to the most recent results (newest first).
+        With a namespace, only results stored under it are eligible.
+        """
+        if self.embedding_worker is not None:
+            self.embedding_worker.flush(timeout=5)
+        try:
+            hits = self.vector_store.query_tasks(objective, top_k=self.context_top_k, namespace=self.namespace)
+            records = [meta for _, _, meta in hits if meta]
+        except Exception as e:
+            self.log('CONTEXT_ERROR', str(e), level='WARNING')
+            records = []
+        return records or self.memory[-self.context_top_k:][::-1]
+
+    def register_prompt_prefixes(self, objective):
+        """Tell an LLM with a prefix cache which prompt openings repeat, so their KV state is computed once."""
+        register = getattr(self.llm, 'register_prefix', None)
+        if register is None:
+            return
+        for prefix in (f"Objective: {objective}\n", "Execute the following task:",
+                       "Results of the tasks this one depends on:\n", FEEDBACK_HEADER + "Task:"):
+            register(prefix)
 
     def generate_tasks(self, objective):
-        context = "\n".join([f"Task: {item['task']}\nResult: {item['result']}" for item in self.memory[-5:]])
+        self.register_prompt_prefixes(objective)
+        instruction = "Generate a list of tasks to achieve the objective, considering the above context."
+        with metrics.time('stage_seconds', stage='context_retrieval'):
+            records = self.retrieve_context(objective)
+        context = self.prompt_builder.pack(records, fixed_text=objective + instruction)
         prompt = f"Objective: {objective}\n"
         if context:
             prompt += f"Previous results (for context):\n{context}\n"
-        prompt += "Generate a list of tasks to achieve the objective, considering the above context."
-        tasks_text = self.llm.generate(prompt)
-        self.tasks = [t.strip() for t in tasks_text.split('\n') if t.strip()][:self.max_tasks]
-        self.log(f"[GENERATE_TASKS] Objective: {objective}\nPrompt: {prompt}\nTasks: {self.tasks}")
+        prompt += instruction
+        with metrics.time('stage_seconds', stage='generate_tasks'):
+            tasks_text = self.llm.generate(prompt)
+        tasks = [t.strip() for t in tasks_text.split('\n') if t.strip()]
+        # Embedding runs before taking the lock, which concurrent tasks and checkpoints need
+        objective_vectors = self.tasks.embed_texts([objective])
+        task_vectors = self.tasks.embed_texts(tasks)
+        with self.lock:
+            self.objective = objective
+            self.tasks.clear()
+            self.tasks.set_objective(objective, vector=objective_vectors[0] if objective_vectors is not None else None)
+            self.tasks.extend(tasks, vectors=task_vectors)
+        self.save_checkpoint(force=True)
+        # Full prompts are only recorded at DEBUG level
+        extra = {'prompt': prompt} if self.logger.enabled_for('DEBUG') else {}
+        self.log('GENERATE_TASKS', objective=objective, tasks=list(self.tasks), **extra)
 
     def prioritize_tasks(self):
-        self.tasks = self.tasks[:self.max_tasks]
-        self.log(f"[PRIORITIZE_TASKS] Tasks: {self.tasks}")
-
-    def execute_task(self, task):
-        prompt = f"Execute the following task: {task}"
-        result = self.llm.generate(prompt)
-        # Tool use: check for TOOL: tool_name: arg
-        if result.strip().startswith('TOOL:'):
-            try:
-                _, tool_name, tool_arg = result.strip().split(':', 2)
-                tool_name = tool_name.strip()
-                tool_arg = tool_arg.strip()
-                tool_output = call_tool(tool_name, tool_arg)
-                result += f"\n[TOOL_OUTPUT] {tool_output}"
-                self.log(f"[TOOL_USE] {tool_name}({tool_arg}) => {tool_output}")
-            except Exception as e:
-                result += f"\n[TOOL_ERROR] {e}"
-                self.log(f"[TOOL_ERROR] {e}")
-        embedding = [0.0] * 1536
-        self.vector_store.add_task(str(uuid.uuid4()), embedding, {"task": task, "result": result})
+        with self.lock:
+            self.tasks.reprioritize()
+            tasks = list(self.tasks)
+        self.log('PRIORITIZE_TASKS', tasks=tasks, level='DEBUG')
+
+    def stream_result(self, prompt):
+        """
+        Generate a task result, streaming it when the LLM supports it. Tool directives at the start of the
+        result are dispatched as soon as their line is complete, and generation stops at the first line
+        after that block, since the model would only be guessing the tool output.
+        Returns (result, [((tool_name, arg), future), ...]) for the tools already dispatched.
+        """
+        if not hasattr(self.llm, 'stream'):
+            return self.llm.generate(prompt), []
+        text = ''
+        dispatched = []
+        leading = True  # still inside the block of directives at the start of the result
+        checked = 0     # text[:checked] holds complete lines that have already been examined
+        stream = self.llm.stream(prompt)
+        try:
+            for chunk in stream:
+                printed = len(text)
+                text += chunk
+                done = False
+                while '\n' in text[checked:]:
+                    end = text.index('\n', checked)
+                    line = text[checked:end]
+                    calls = parse_tool_calls(line)
+                    if calls and leading:
+                        dispatched.append((calls[0], self.tool_executor.submit(*calls[0])))
+                    elif line.strip() and dispatched:
+                        text = text[:checked].rstrip('\n')
+                        done = True
+                        break
+                    elif line.strip():
+                        leading = False
+                    checked = end + 1
+                if self.stream_output:
+                    print(text[printed:], end='', flush=True)
+                if done:
+                    break
+        finally:
+            stream.close()
+        return text, dispatched
+
+    def execute_task(self, task, context=None, queue_follow_ups=True):
+        """
+        Execute a task, with the results of the tasks it depends on as context. Returns (result, follow_ups),
+        the follow-up tasks suggested by the feedback step (queued on self.tasks unless queue_follow_ups is False).
+        """
+        prompt = ''
+        instruction = f"Execute the following task: {task}"
+        results = self.prompt_builder.pack(context, fixed_text=instruction) if context else ''
+        if results:
+            prompt += f"Results of the tasks this one depends on:\n{results}\n"
+        prompt += instruction
+        with self.lock:
+            self.running.append(task)
+        try:
+            with metrics.time('task_seconds'):
+                outcome = self._execute(task, prompt, queue_follow_ups)
+        except Exception:
+            metrics.inc('tasks_total', outcome='error')
+            self._finish_running(task)
+            raise
+        metrics.inc('tasks_total', outcome='ok')
+        # On KeyboardInterrupt the task stays in `running`, so a checkpoint taken on the way out keeps it
+        self._finish_running(task)
+        return outcome
+
+    def _finish_running(self, task):
+        with self.lock:
+            self.running.remove(task)
+        self.save_checkpoint()
+
+    def _execute(self, task, prompt, queue_follow_ups):
+        if self.stream_output:
+            print(f"[INFO] Executing: {task}\n[OUTPUT] ", end='', flush=True)
+        with metrics.time('stage_seconds', stage='llm_generate'):
+            result, dispatched = self.stream_result(prompt)
+        if self.stream_output:
+            print()
+        # Tool use: every "TOOL: tool_name: arg" line; tools run concurrently, outputs are appended in order
+        calls = parse_tool_calls(result)
+        futures = [future for _, future in dispatched]
+        futures += [self.tool_executor.submit(name, arg) for name, arg in calls[len(dispatched):]]
+        with metrics.time('stage_seconds', stage='tool_calls'):
+            for (tool_name, tool_arg), future in zip(calls, futures):
+                try:
+                    tool_output = future.result()
+                    result += f"\n[TOOL_OUTPUT] {tool_output}"
+                    self.log('TOOL_USE', tool=tool_name, arg=tool_arg, output=tool_output)
+                    if self.stream_output:
+                        print(f"[TOOL_OUTPUT] {tool_output}")
+                except Exception as e:
+                    result += f"\n[TOOL_ERROR] {e}"
+                    self.log('TOOL_ERROR', str(e), tool=tool_name, arg=tool_arg, level='ERROR')
+                    if self.stream_output:
+                        print(f"[TOOL_ERROR] {e}")
         record = {"task": task, "result": result}
-        self.completed.append(record)
-        self.memory.append(record)
-        self.log(f"[EXECUTE_TASK] Task: {task}\nResult: {result}")
-        print(f"[INFO] Executing: {task}\n[OUTPUT] {result}")
-        feedback_prompt = (
-            f"Reflect on the result of the following task and suggest improvements or follow-up tasks.\n"
-            f"Task: {task}\nResult: {result}\n"
-            f"If improvements or follow-ups are needed, list them as new tasks. Otherwise, reply 'No further action needed.'"
+        with self.lock:
+            self.completed.append(record)
+            self.memory.append(record)
+            del self.memory[:-self.memory_size]
+            number = self.result_count
+            self.result_count += 1
+        # With an EmbeddingWorker this only queues the result; the worker records embedding_batch_seconds
+        with metrics.time('stage_seconds', stage='vector_upsert'):
+            self.store_result(task, result, number)
+        self.log('EXECUTE_TASK', task=task, result=result)
+        if not self.stream_output:
+            print(f"[INFO] Executing: {task}\n[OUTPUT] {result}")
+        feedback_template = (
+            FEEDBACK_HEADER +
+            "Task: {task}\nResult: {result}\n"
+            "If improvements or follow-ups are needed, list them as new tasks. Otherwise, reply 'No further action needed.'"
         )
-        feedback = self.llm.generate(feedback_prompt)
-        self.log(f"[FEEDBACK] {feedback}")
+        # Long tool output is compressed to what the context window can take
+        budget = self.prompt_builder.budget(feedback_template.format(task=task, result=''))
+        feedback_prompt = feedback_template.format(task=task, result=self.prompt_builder.fit(result, budget))
+        with metrics.time('stage_seconds', stage='feedback_generate'):
+            feedback = self.llm.generate(feedback_prompt)
+        self.log('FEEDBACK', feedback, task=task)
         print(f"[FEEDBACK] {feedback}")
+        new_tasks = []
         if 'No further action needed' not in feedback:
             new_tasks = [t.strip() for t in feedback.split('\n') if t.strip()]
-            self.tasks.extend(new_tasks)
-            self.prioritize_tasks()
-        self.save_results()
+            if queue_follow_ups:
+                vectors = self.tasks.embed_texts(new_tasks)
+                with self.lock:
+                    queued = self.tasks.extend(new_tasks, vectors=vectors)
+                self.log('QUEUE_TASKS', task=task, proposed=len(new_tasks), queued=queued, level='DEBUG')
+        with metrics.time('stage_seconds', stage='save_results'):
+            self.save_results()
+        return result, new_tasks
+
+    def run_concurrent(self, objective, workers=4, max_executions=None, resume=False):
+        """
+        Non-interactive loop: execute up to `workers` tasks at once until the queue is empty or
+        max_executions tasks have run. Pair with llm_batcher.BatchingLLM so concurrent LLM calls
+        are batched into shared forward passes. With resume, a restored queue is used instead of generating one.
+        """
+        if not (resume and self.tasks):
+            self.generate_tasks(objective)
+        self.prioritize_tasks()
+        executed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = set()
+            while True:
+                with self.lock:
+                    while (self.tasks and len(in_flight) < workers and not self.stop_requested.is_set()
+                           and (max_executions is None or executed < max_executions)):
+                        in_flight.add(pool.submit(self.execute_task, self.tasks.pop()))
+                        executed += 1
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"[ERROR] Task failed: {e}")
+                        self.log('TASK_ERROR', str(e), level='ERROR')
+        self.save_checkpoint(force=True)
+        self.log('RUN_COMPLETE', objective=objective, executed=executed)
+
+    def generate_task_graph(self, objective):
+        """Ask for numbered tasks annotated with their dependencies and build a TaskGraph from them."""
+        self.register_prompt_prefixes(objective)
+        instruction = ("Generate a numbered list of tasks to achieve the objective, considering the above context. "
+                       "If a task needs the results of earlier tasks, end it with '(depends on: <numbers>)'.")
+        context = self.prompt_builder.pack(self.retrieve_context(objective), fixed_text=objective + instruction)
+        prompt = f"Objective: {objective}\n"
+        if context:
+            prompt += f"Previous results (for context):\n{context}\n"
+        prompt += instruction
+        self.objective = objective
+        graph = TaskGraph()
+        for task_id, task, deps in parse_task_graph(self.llm.generate(prompt))[:self.max_tasks]:
+            graph.add(task_id, task, deps)
+        cyclic = graph.break_cycles()
+        if cyclic:
+            self.log('GRAPH_CYCLE', 'Dropped dependencies between tasks on a cycle', tasks=sorted(cyclic), level='WARNING')
+        extra = {'prompt': prompt} if self.logger.enabled_for('DEBUG') else {}
+        self.log('GENERATE_TASK_GRAPH', objective=objective,
+                 tasks={t: {'task': graph.tasks[t], 'deps': sorted(graph.deps[t])} for t in graph.tasks}, **extra)
+        return graph
+
+    def run_graph(self, objective, max_parallel=4, max_executions=None, resume=False):
+        """
+        Non-interactive DAG mode: every task whose dependencies have completed runs at once, up to max_parallel,
+        and gets their results as context. Follow-up tasks from feedback are added to the graph as dependents
+        of the task that produced them. A failed task's dependents are skipped.
+        With resume, a restored graph continues from its unfinished tasks.
+        """
+        if not (resume and self.graph is not None):
+            self.graph = self.generate_task_graph(objective)
+            self.save_checkpoint(force=True)
+        graph = self.graph
+        executed = 0
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            in_flight = {}
+            while True:
+                with self.lock:  # the graph is also read by checkpoints taken on worker threads
+                    for task_id in graph.ready():
+                        if (len(in_flight) >= max_parallel or self.stop_requested.is_set()
+                                or (max_executions is not None and executed >= max_executions)):
+                            break
+                        future = pool.submit(self.execute_task, graph.start(task_id), graph.dependency_results(task_id),
+                                             queue_follow_ups=False)
+                        in_flight[future] = task_id
+                        executed += 1
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_id = in_flight.pop(future)
+                    try:
+                        result, follow_ups = future.result()
+                    except Exception as e:
+                        print(f"[ERROR] Task failed: {e}")
+                        with self.lock:
+                            skipped = graph.fail(task_id)
+                        self.log('TASK_ERROR', str(e), task=graph.tasks[task_id], skipped=[graph.tasks[t] for t in skipped],
+                                 level='ERROR')
+                        continue
+                    with self.lock:
+                        graph.complete(task_id, result)
+                        room = self.max_tasks - graph.pending()
+                        for n, task in enumerate(follow_ups[:max(room, 0)]):
+                            graph.add(f"{task_id}.{n + 1}", task, [task_id])
+                    self.save_checkpoint()
+        self.save_checkpoint(force=True)
+        self.log('RUN_COMPLETE', objective=objective, executed=executed, mode='graph')
 
-    def run_loop(self, objective):
-        self.generate_tasks(objective)
+    def run_loop(self, objective, resume=False):
+        """Interactive loop: ask the user about every task before it runs."""
+        if not (resume and self.tasks):
+            self.generate_tasks(objective)
         self.prioritize_tasks()
-        while self.tasks:
-            task = self.tasks.pop(0)
+        while self.tasks and not self.stop_requested.is_set():
+            task = self.tasks.pop()
             print(f"\n[INTERACTIVE] Next task: {task}")
             print("Options: [a]pprove, [e]dit, [s]kip, [n]ew task, [c]hange objective, [q]uit")
             choice = input("Your choice: ").strip().lower()
-            self.log(f"[USER_CHOICE] Task: {task} Choice: {choice}")
+            self.log('USER_CHOICE', task=task, choice=choice)
             if choice == 'a' or choice == '':
                 self.execute_task(task)
             elif choice == 'e':
@@ -97,25 +466,28 @@ class TaskManager:
                     self.execute_task(new_task)
             elif choice == 's':
                 print("[INFO] Task skipped.")
-                self.log(f"[SKIP_TASK] {task}")
+                self.log('SKIP_TASK', task=task)
                 continue
             elif choice == 'n':
                 new_task = input("Enter new task: ").strip()
                 if new_task:
-                    self.tasks.insert(0, new_task)
-                    self.log(f"[NEW_TASK] {new_task}")
+                    self.tasks.push(new_task, priority=TaskScheduler.URGENT, force=True)
+                    self.log('NEW_TASK', task=new_task)
             elif choice == 'c':
                 new_objective = input("Enter new objective: ").strip()
                 if new_objective:
-                    self.log(f"[CHANGE_OBJECTIVE] {new_objective}")
+                    self.log('CHANGE_OBJECTIVE', objective=new_objective)
                     self.generate_tasks(new_objective)
                     self.prioritize_tasks()
                     continue
             elif choice == 'q':
+                # The task on offer goes back to the front of the queue, so --resume asks about it again
+                self.tasks.push(task, priority=TaskScheduler.URGENT, force=True)
+                self.save_checkpoint(force=True)
                 print("[INFO] Exiting agent loop.")
-                self.log("[QUIT]")
+                self.log('QUIT')
                 break
             else:
                 print("[WARN] Invalid choice. Approving by default.")
-                self.log(f"[INVALID_CHOICE] {choice} for task {task}")
+                self.log('INVALID_CHOICE', task=task, choice=choice, level='WARNING')
                 self.execute_task(task) 
\ No newline at end of file
@@ -0,0 +1,199 @@
+import base64
+import heapq
+from collections import Counter
+import numpy as np
+from vector_store import normalize_rows
+
+
+class TaskScheduler:
+    """
+    Priority queue of pending tasks backed by a binary heap (O(log n) push/pop).
+    score = relevance_weight * cosine(task, objective) + priority_weight * priority + age_weight * (-insertion order),
+    so relevant, user-prioritized and older tasks come first. Relevance needs an `embed` callable
+    (list of texts -> 2-D array, e.g. VectorStore.embed_many); without it tasks are ordered by priority and age.
+    New tasks are embedded and scored in one batch, and a task whose embedding is within dedup_threshold
+    cosine similarity of a pending task is dropped. Once max_size tasks are pending, overflow decides what
+    gives way: 'drop_lowest' evicts the lowest-scoring task (found through a second, min-score heap),
+    'drop_new' rejects the incoming one, 'keep_all' grows. Tasks pushed with force skip both checks.
+    Embedding is the slow part: callers that guard the scheduler with a lock can compute vectors with embed_texts()
+    beforehand and pass them to extend()/set_objective(), so only the heap update happens under the lock.
+    """
+    URGENT = 1e6  # priority for tasks the user asks to run next
+
+    def __init__(self, embed=None, max_size=None, overflow='drop_lowest', relevance_weight=1.0, priority_weight=1.0,
+                 age_weight=0.01, dedup_threshold=0.95):
+        if overflow not in ('drop_lowest', 'drop_new', 'keep_all'):
+            raise ValueError(f"Unknown overflow policy '{overflow}'")
+        self.embed = embed
+        self.max_size = max_size
+        self.overflow = overflow
+        self.relevance_weight = relevance_weight
+        self.priority_weight = priority_weight
+        self.age_weight = age_weight
+        self.dedup_threshold = dedup_threshold
+        self.objective_vector = None
+        self.heap = []     # [-score, seq]
+        self.low_heap = []  # [score, seq], for eviction; both heaps keep popped entries until they surface
+        self.entries = {}  # seq -> {'task', 'priority', 'vector', 'score'} for pending tasks
+        self.pending_texts = Counter()  # task text -> pending copies, for exact-match dedup without embeddings
+        self.next_seq = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def __iter__(self):
+        """Pending tasks, highest score first (does not consume them)."""
+        for _, seq in sorted(self.heap):
+            if seq in self.entries:
+                yield self.entries[seq]['task']
+
+    def embed_texts(self, texts):
+        """Normalized embeddings of texts for extend() and set_objective(), or None without an embed callable."""
+        texts = list(texts)
+        if self.embed is None or not texts:
+            return None
+        return normalize_rows(self.embed(texts))
+
+    def set_objective(self, objective, vector=None):
+        """Rank pending tasks against a new objective; vector is its embed_texts() embedding, if already computed."""
+        if vector is None and self.embed is not None:
+            vector = self.embed_texts([objective])[0]
+        if vector is not None:
+            self.objective_vector = vector
+        self.reprioritize()
+
+    def _scores(self, vectors, priorities, seqs):
+        scores = self.priority_weight * np.asarray(priorities, dtype=np.float64) - self.age_weight * np.asarray(seqs)
+        if vectors is not None and self.objective_vector is not None:
+            scores += self.relevance_weight * (vectors @ self.objective_vector)
+        return scores
+
+    def push(self, task, priority=0.0, force=False):
+        return self.extend([task], priority=priority, force=force) == 1
+
+    def _lowest(self):
+        while self.low_heap[0][1] not in self.entries:
+            heapq.heappop(self.low_heap)
+        return self.low_heap[0]
+
+    def extend(self, tasks, priority=0.0, vectors=None, force=False):
+        """
+        Add tasks in one batch; returns how many were queued (duplicates and rejected overflow are not).
+        vectors are the tasks' embed_texts() embeddings, if already computed. With force (tasks the user asked
+        for), every task is queued: no deduplication and no overflow policy.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return 0
+        if vectors is None:
+            vectors = self.embed_texts(tasks)
+        keep = list(range(len(tasks))) if force else self._deduplicate(tasks, vectors)
+        seqs = list(range(self.next_seq, self.next_seq + len(keep)))
+        self.next_seq += len(keep)
+        kept_vectors = vectors[keep] if vectors is not None else None
+        scores = self._scores(kept_vectors, [priority] * len(keep), seqs)
+        queued = 0
+        for n, (i, seq, score) in enumerate(zip(keep, seqs, scores)):
+            if not force and self.max_size is not None and len(self.entries) >= self.max_size:
+                if self.overflow == 'drop_new':
+                    continue
+                if self.overflow == 'drop_lowest':
+                    lowest_score, lowest = self._lowest()
+                    if lowest_score >= score:
+                        continue
+                    heapq.heappop(self.low_heap)
+                    self._remove(lowest)
+            self.pending_texts[tasks[i]] += 1
+            self.entries[seq] = {'task': tasks[i], 'priority': priority,
+                                 'vector': kept_vectors[n] if kept_vectors is not None else None, 'score': float(score)}
+            heapq.heappush(self.heap, [-float(score), seq])
+            heapq.heappush(self.low_heap, [float(score), seq])
+            queued += 1
+        if len(self.low_heap) > 2 * len(self.entries) + 64:
+            self.reprioritize()  # drop popped entries from the heaps
+        return queued
+
+    def _deduplicate(self, tasks, vectors):
+        """Indices of tasks that are neither near-duplicates of pending tasks nor of earlier tasks in the batch."""
+        keep = []
+        if vectors is None:
+            seen = set()
+            for i, task in enumerate(tasks):
+                if task not in seen and task not in self.pending_texts:
+                    seen.add(task)
+                    keep.append(i)
+            return keep
+        pending = [e['vector'] for e in self.entries.values() if e['vector'] is not None]
+        pending = np.vstack(pending) if pending else np.empty((0, vectors.shape[1]), dtype=np.float32)
+        similar_to_pending = (vectors @ pending.T).max(axis=1) if len(pending) else np.full(len(tasks), -1.0)
+        within_batch = vectors @ vectors.T
+        for i in range(len(tasks)):
+            if similar_to_pending[i] >= self.dedup_threshold:
+                continue
+            if keep and within_batch[i, keep].max() >= self.dedup_threshold:
+                continue
+            keep.append(i)
+        return keep
+
+    def pop(self):
+        """Remove and return the highest-scoring task; raises IndexError when empty."""
+        while self.heap:
+            _, seq = heapq.heappop(self.heap)
+            if seq in self.entries:
+                return self._remove(seq)['task']
+        raise IndexError("pop from an empty TaskScheduler")
+
+    def _remove(self, seq):
+        entry = self.entries.pop(seq)
+        self.pending_texts[entry['task']] -= 1
+        if not self.pending_texts[entry['task']]:
+            del self.pending_texts[entry['task']]
+        return entry
+
+    def reprioritize(self):
+        """Rescore every pending task in one vectorized pass (e.g. after the objective changes)."""
+        if not self.entries:
+            self.heap = []
+            self.low_heap = []
+            return
+        seqs = list(self.entries)
+        vectors = None
+        if all(self.entries[s]['vector'] is not None for s in seqs):
+            vectors = np.vstack([self.entries[s]['vector'] for s in seqs])
+        scores = self._scores(vectors, [self.entries[s]['priority'] for s in seqs], seqs)
+        for seq, score in zip(seqs, scores):
+            self.entries[seq]['score'] = float(score)
+        self.heap = [[-float(score), seq] for seq, score in zip(seqs, scores)]
+        heapq.heapify(self.heap)
+        self.low_heap = [[float(score), seq] for seq, score in zip(seqs, scores)]
+        heapq.heapify(self.low_heap)
+
+    def snapshot(self):
+        """JSON-serializable state (embeddings as base64 float32), for checkpoints."""
+        def encode(vector):
+            return None if vector is None else base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode('ascii')
+        return {
+            'next_seq': self.next_seq,
+            'objective_vector': encode(self.objective_vector),
+            'entries': [[seq, e['task'], e['priority'], encode(e['vector'])] for seq, e in sorted(self.entries.items())],
+        }
+
+    def restore(self, snapshot):
+        """Replace the pending tasks with a snapshot() without re-embedding them."""
+        def decode(data):
+            return None if data is None else np.frombuffer(base64.b64decode(data), dtype=np.float32)
+        self.next_seq = snapshot['next_seq']
+        self.objective_vector = decode(snapshot['objective_vector'])
+        self.entries = {seq: {'task': task, 'priority': priority, 'vector': decode(vector), 'score': 0.0}
+                        for seq, task, priority, vector in snapshot['entries']}
+        self.pending_texts = Counter(e['task'] for e in self.entries.values())
+        self.reprioritize()
+
+    def clear(self):
+        self.heap = []
+        self.low_heap = []
+        self.entries = {}
+        self.pending_texts = Counter()
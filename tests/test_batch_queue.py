@@ -0,0 +1,44 @@
+import threading
+import time
+from batch_queue import BatchQueue
+
+
+def test_next_batch_takes_up_to_max_size():
+    q = BatchQueue()
+    for n in range(5):
+        q.put(n)
+    assert q.next_batch(3) == ([0, 1, 2], False)
+    assert q.next_batch(3) == ([3, 4], False)
+
+
+def test_next_batch_waits_for_items_within_max_wait():
+    q = BatchQueue()
+    q.put('first')
+    threading.Timer(0.02, q.put, args=('second',)).start()
+    items, closed = q.next_batch(10, max_wait=0.5)
+    assert items == ['first', 'second'] and not closed
+
+
+def test_next_batch_timeout_returns_empty():
+    started = time.monotonic()
+    assert BatchQueue().next_batch(10, timeout=0.05) == ([], False)
+    assert time.monotonic() - started >= 0.05
+
+
+def test_close_is_seen_after_pending_items():
+    q = BatchQueue()
+    q.put(1)
+    q.put(2)
+    q.close()
+    assert q.next_batch(10) == ([1, 2], True)
+
+
+def test_close_marker_does_not_block_join():
+    q = BatchQueue()
+    q.put('item')
+    q.close()
+    items, closed = q.next_batch(1)
+    assert items == ['item'] and not closed
+    q.task_done()
+    assert q.next_batch(1) == ([], True)
+    q.join()  # returns: the close marker was marked done by next_batch
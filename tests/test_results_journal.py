@@ -0,0 +1,128 @@
+import json
+import os
+import pytest
+from benchmarks.fakes import FakeEmbedder, FakeLLM
+from benchmarks.scenarios import quiet
+from checkpoint import Checkpoint
+from results_journal import ResultsJournal
+from task_manager import TaskManager
+from tool_executor import ToolExecutor
+from vector_store import VectorStore
+
+
+def records(n, start=0):
+    return [{'task': f'task {i}', 'result': f'result {i}'} for i in range(start, start + n)]
+
+
+def test_append_iterate_and_tail(tmp_path):
+    journal = ResultsJournal(str(tmp_path / 'results.jsonl'))
+    for record in records(5):
+        journal.append(record)
+    assert list(journal) == records(5)
+    assert len(journal) == 5
+    assert journal.tail(2) == records(2, start=3)
+    assert journal.tail(10) == records(5)
+    assert journal.tail(0) == []
+    journal.close()
+
+
+def test_corrupt_lines_are_skipped_and_not_counted(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    lines = [json.dumps(r) for r in records(3)]
+    path.write_text('\n'.join([lines[0], lines[1], '{not json', lines[2]]) + '\n')
+    journal = ResultsJournal(str(path))
+    assert len(journal) == 3
+    assert journal.corrupt == 1
+    assert journal.tail(3) == records(3)
+    assert list(journal) == records(3)
+    journal.compact()
+    assert '{not json' not in path.read_text()
+    journal.close()
+
+
+def test_torn_last_line_is_cut_on_open(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records(2)) + '{"task": "torn')
+    journal = ResultsJournal(str(path))
+    journal.append(records(1, start=2)[0])
+    assert list(journal) == records(3)
+    journal.close()
+
+
+def test_max_records_keeps_the_newest(tmp_path):
+    journal = ResultsJournal(str(tmp_path / 'results.jsonl'), max_records=3, compact_every=4)
+    for record in records(8):
+        journal.append(record)
+    assert list(journal)[-3:] == records(3, start=5)
+    assert len(journal) <= 4
+    journal.close()
+
+
+def test_legacy_results_are_migrated(tmp_path):
+    legacy = tmp_path / 'results.json'
+    legacy.write_text(json.dumps(records(2)))
+    journal = ResultsJournal(str(tmp_path / 'results.jsonl'), legacy_path=str(legacy))
+    assert list(journal) == records(2)
+    assert os.path.exists(str(legacy) + '.migrated')
+    journal.close()
+
+
+def test_checkpoint_save_load_and_throttle(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'), min_interval=60)
+    assert checkpoint.load() is None
+    assert checkpoint.save({'objective': 'first'})
+    assert not checkpoint.save({'objective': 'throttled'})
+    assert checkpoint.save({'objective': 'forced'}, force=True)
+    assert checkpoint.load()['objective'] == 'forced'
+    checkpoint.clear()
+    assert checkpoint.load() is None
+
+
+def make_manager(directory, store, checkpoint, tasks=6):
+    return TaskManager(FakeLLM(tasks=tasks), store, max_tasks=tasks, log_file=os.path.join(directory, 'output.log'),
+                       results_file=os.path.join(directory, 'results.jsonl'), stream_output=False,
+                       tool_executor=ToolExecutor(), checkpoint=checkpoint)
+
+
+def close_manager(manager):
+    manager.tool_executor.shutdown()
+    manager.logger.close()
+    manager.completed.close()
+
+
+@pytest.mark.parametrize('provider', ['local', 'mmap'])
+def test_run_checkpoint_and_resume(tmp_path, provider):
+    directory = str(tmp_path)
+    options = {'path': os.path.join(directory, 'index')} if provider == 'mmap' else None
+
+    def open_store():
+        return VectorStore(provider, 'test', embedding_model=FakeEmbedder(), index_options=options)
+
+    store = open_store()
+    checkpoint = Checkpoint(os.path.join(directory, 'checkpoint.json'), min_interval=0)
+    manager = make_manager(directory, store, checkpoint)
+    with quiet():
+        manager.run_concurrent('Test objective', workers=2, max_executions=3)
+    manager.save_checkpoint(force=True)
+    executed = len(manager.completed)
+    pending = list(manager.tasks)
+    close_manager(manager)
+    if provider == 'mmap':
+        store.index.close()
+    assert executed == 3
+
+    state = checkpoint.load()
+    assert state['objective'] == 'Test objective'
+    assert state['results'] == state['embedded'] == executed
+
+    store = open_store()
+    resumed = make_manager(directory, store, checkpoint)
+    with quiet():
+        resumed.restore(state)
+    assert resumed.objective == 'Test objective'
+    assert list(resumed.tasks) == pending
+    assert resumed.result_count == executed
+    # The mmap index kept its entries; the in-memory one was rebuilt from the journal
+    assert len(store.index) == executed
+    assert resumed.embedded_results == executed
+    close_manager(resumed)
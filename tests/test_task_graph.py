@@ -0,0 +1,62 @@
+from task_graph import TaskGraph, parse_task_graph
+
+
+def test_numbered_lines_with_annotations_and_references():
+    text = ('Here are the tasks:\n'
+            '1. Collect sources\n'
+            '2) Summarize sources (depends on: 1)\n'
+            '3. Compare the summary with the results of task 1 and task 2\n'
+            'Let me know if you need more.')
+    assert parse_task_graph(text) == [
+        ('1', 'Collect sources', []),
+        ('2', 'Summarize sources', ['1']),
+        ('3', 'Compare the summary with the results of task 1 and task 2', ['1', '2']),
+    ]
+
+
+def test_repeated_ids_and_self_references_are_dropped():
+    text = '1. First\n2. Second (after: 2, 1)\n2. Duplicate second'
+    assert parse_task_graph(text) == [('1', 'First', []), ('2', 'Second', ['1'])]
+
+
+def test_unnumbered_lines_are_numbered_in_order():
+    assert parse_task_graph('Do a\n\nDo b') == [('1', 'Do a', []), ('2', 'Do b', [])]
+
+
+def test_ready_complete_and_fail():
+    graph = TaskGraph()
+    graph.add('1', 'a')
+    graph.add('2', 'b', ['1'])
+    graph.add('3', 'c', ['2', 'unknown'])
+    graph.add('4', 'd')
+    assert graph.ready() == ['1', '4']
+    graph.start('1')
+    graph.complete('1', 'done')
+    assert graph.ready() == ['2', '4']
+    assert graph.dependency_results('2') == [{'task': 'a', 'result': 'done'}]
+    graph.start('2')
+    assert graph.fail('2') == ['3']
+    assert graph.pending() == 1
+
+
+def test_cycles_are_broken():
+    graph = TaskGraph()
+    graph.add('1', 'a', ['2'])
+    graph.add('2', 'b', ['1'])
+    graph.add('3', 'c', ['2'])
+    assert graph.find_cycles() == {'1', '2', '3'}
+    assert graph.break_cycles() == {'1', '2', '3'}
+    assert graph.find_cycles() == set()
+    assert graph.ready() == ['1', '2', '3']  # tasks behind the cycle lose their edges into it too
+
+
+def test_dict_round_trip_reruns_unfinished_tasks():
+    graph = TaskGraph()
+    graph.add('1', 'a')
+    graph.add('2', 'b', ['1'])
+    graph.start('1')
+    graph.complete('1', 'done')
+    graph.start('2')  # still running when the checkpoint was taken
+    restored = TaskGraph.from_dict(graph.to_dict())
+    assert restored.ready() == ['2']
+    assert restored.results == {'1': 'done'}
@@ -0,0 +1,101 @@
+import random
+import numpy as np
+import pytest
+from task_scheduler import TaskScheduler
+
+
+def keyword_embed(texts):
+    """Two-dimensional embedding: 'alpha' texts point one way, everything else the other."""
+    return np.array([[1.0, 0.0] if 'alpha' in t else [0.0, 1.0] for t in texts], dtype=np.float32)
+
+
+def test_pop_order_follows_priority_then_age():
+    s = TaskScheduler()
+    s.push('low', priority=0)
+    s.push('high', priority=5)
+    s.push('low too', priority=0)
+    assert [s.pop() for _ in range(3)] == ['high', 'low', 'low too']
+    with pytest.raises(IndexError):
+        s.pop()
+
+
+def test_relevance_ranks_tasks_close_to_the_objective_first():
+    s = TaskScheduler(embed=keyword_embed, dedup_threshold=2.0)
+    s.set_objective('alpha objective')
+    s.extend(['beta task', 'alpha task'])
+    assert s.pop() == 'alpha task'
+
+
+def test_exact_duplicates_are_dropped_without_embeddings():
+    s = TaskScheduler()
+    assert s.extend(['a', 'b', 'a']) == 2
+    assert not s.push('b')
+    s.pop()
+    s.pop()
+    assert s.push('a')  # no longer pending
+
+
+def test_near_duplicates_are_dropped_with_embeddings():
+    s = TaskScheduler(embed=keyword_embed)
+    assert s.extend(['alpha one', 'alpha two', 'beta']) == 2
+
+
+def test_drop_lowest_matches_a_brute_force_reference():
+    rng = random.Random(0)
+    s = TaskScheduler(max_size=20, age_weight=0)
+    reference = {}
+    for n in range(1000):
+        task, priority = f'task {n}', rng.random()
+        if len(reference) < 20:
+            reference[task] = priority
+        else:
+            lowest = min(reference, key=reference.get)
+            if reference[lowest] < priority:
+                del reference[lowest]
+                reference[task] = priority
+        s.push(task, priority=priority)
+        if n % 7 == 0:
+            best = max(reference, key=reference.get)
+            assert s.pop() == best
+            del reference[best]
+    assert sorted(s) == sorted(reference)
+
+
+def test_drop_new_rejects_overflow():
+    s = TaskScheduler(max_size=2, overflow='drop_new')
+    assert s.extend(['a', 'b', 'c']) == 2
+    assert set(s) == {'a', 'b'}
+
+
+def test_forced_push_skips_dedup_and_capacity():
+    s = TaskScheduler(max_size=1, overflow='drop_new')
+    s.push('a')
+    assert s.push('a', priority=TaskScheduler.URGENT, force=True)
+    assert s.push('b', force=True)
+    assert len(s) == 3
+    assert s.pop() == 'a'
+
+
+def test_precomputed_vectors_are_used_instead_of_embed():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return keyword_embed(texts)
+
+    s = TaskScheduler(embed=embed)
+    vectors = s.embed_texts(['alpha task'])
+    s.extend(['alpha task'], vectors=vectors)
+    assert calls == [['alpha task']]
+
+
+def test_snapshot_restore_round_trip():
+    s = TaskScheduler(embed=keyword_embed, dedup_threshold=2.0)
+    s.set_objective('alpha objective')
+    s.extend(['beta task', 'alpha task', 'alpha again'], priority=1)
+    calls = []
+    restored = TaskScheduler(embed=lambda texts: calls.append(texts) or keyword_embed(texts), dedup_threshold=2.0)
+    restored.restore(s.snapshot())
+    assert calls == []
+    assert list(restored) == list(s)
+    assert [restored.pop() for _ in range(3)] == [s.pop() for _ in range(3)]
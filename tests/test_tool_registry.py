@@ -0,0 +1,74 @@
+import pytest
+from metrics import registry as metrics
+from tool_executor import ToolExecutor, parse_tool_calls
+from tool_registry import ToolArgumentError, ToolError, call_tool, tool_specs
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(timeout=5)
+    yield executor
+    executor.shutdown()
+
+
+def test_arguments_are_split_on_the_separator():
+    assert call_tool('caesar_cipher', 'abc::1') == 'bcd'
+    assert float(call_tool('unit_converter', '100::celsius::fahrenheit')) == 212.0
+    # The last parameter takes the rest of the argument, separators included
+    assert tool_specs['write_file'].parse('out.txt::a::b') == ['out.txt', 'a::b']
+
+
+def test_wrong_argument_count_is_a_tool_error():
+    output = call_tool('caesar_cipher', 'abc')
+    assert isinstance(output, ToolError)
+    assert output == 'caesar_cipher error: expected text::shift, got 1 argument(s)'
+    with pytest.raises(ToolArgumentError):
+        tool_specs['unit_converter'].parse('1::km')
+
+
+def test_single_parameter_tools_take_the_whole_argument():
+    assert call_tool('rot13_encoder', 'a::b') == 'n::o'
+
+
+def test_unknown_tool_is_a_tool_error():
+    output = call_tool('no_such_tool', 'arg')
+    assert isinstance(output, ToolError)
+    assert output == "Tool 'no_such_tool' not found."
+
+
+def test_failing_tool_returns_a_tool_error():
+    output = call_tool('math_calculator', '1 +')
+    assert isinstance(output, ToolError) and output.startswith('Math error')
+    assert not isinstance(call_tool('math_calculator', '1 + 2'), ToolError)
+
+
+def test_usage_lists_the_parameters():
+    assert tool_specs['unit_converter'].usage == 'TOOL: unit_converter: value::from_unit::to_unit'
+
+
+def test_parse_tool_calls_reads_one_directive_per_line():
+    text = 'Plan:\nTOOL: math_calculator: 2 * 3\n  TOOL:caesar_cipher:abc::2  \nTOOL: missing colon'
+    assert parse_tool_calls(text) == [('math_calculator', '2 * 3'), ('caesar_cipher', 'abc::2')]
+
+
+def test_executor_memoizes_pure_tools_but_not_errors(executor):
+    metrics.reset()
+    # Sequential runs: calls submitted together all miss before the first one finishes
+    assert executor.run([('sha256_hasher', 'x')]) == executor.run([('sha256_hasher', 'x')]) == [call_tool('sha256_hasher', 'x')]
+    assert executor.memo_stats()['hits'] == 1
+    outputs = executor.run([('math_calculator', '1 +')])
+    outputs += executor.run([('math_calculator', '1 +')])
+    assert all(isinstance(output, ToolError) for output in outputs)
+    assert executor.memo_stats()['entries'] == 1
+    assert metrics.counter('tool_calls_total', tool='math_calculator', outcome='error') == 2
+    assert metrics.counter('tool_calls_total', tool='sha256_hasher', outcome='memo') == 1
+
+
+def test_executor_reports_unknown_tools_and_timeouts(executor):
+    metrics.reset()
+    executor.timeouts['timer_sleep'] = 0.05
+    missing, slow = executor.run([('no_such_tool', 'x'), ('timer_sleep', '1')])
+    assert isinstance(missing, ToolError) and isinstance(slow, ToolError)
+    assert 'timed out' in slow
+    assert metrics.counter('tool_calls_total', tool='no_such_tool', outcome='not_found') == 1
+    assert metrics.counter('tool_calls_total', tool='timer_sleep', outcome='timeout') == 1
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from benchmarks.fakes import FakeEmbedder
+from ivf_index import IVFIndex
+from mmap_index import MmapIndex
+from vector_store import MatrixIndex, VectorStore, normalize_rows
+
+DIM = 16
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((500, DIM)).astype(np.float32), rng.standard_normal((20, DIM)).astype(np.float32)
+
+
+def brute_force(vectors, queries, top_k):
+    scores = normalize_rows(queries) @ normalize_rows(vectors).T
+    return [[f'id-{i}' for i in np.argsort(-row, kind='stable')[:top_k]] for row in scores]
+
+
+def fill(index, vectors):
+    for i, vector in enumerate(vectors):
+        index.add(f'id-{i}', vector.tolist(), {'row': i})
+    return index
+
+
+def ids(results):
+    return [[task_id for _, task_id, _ in hits] for hits in results]
+
+
+def test_matrix_index_matches_brute_force(data):
+    vectors, queries = data
+    index = fill(MatrixIndex(capacity=8), vectors)  # grows past its initial capacity
+    results = index.query_many(queries, top_k=5)
+    assert ids(results) == brute_force(vectors, queries, 5)
+    assert all(scores == sorted(scores, reverse=True) for scores in ([s for s, _, _ in hits] for hits in results))
+    assert results[0][0][2] == {'row': int(results[0][0][1][3:])}
+
+
+def test_matrix_index_replaces_existing_ids(data):
+    vectors, _ = data
+    index = MatrixIndex()
+    index.add('a', vectors[0].tolist(), {'v': 1})
+    index.add('a', vectors[1].tolist(), {'v': 2})
+    assert len(index) == 1
+    assert index.query(vectors[1].tolist(), top_k=1)[0][1:] == ('a', {'v': 2})
+    with pytest.raises(ValueError):
+        index.add('b', [1.0, 0.0], {})
+
+
+def test_ivf_is_exact_when_probing_every_list(data):
+    vectors, queries = data
+    index = fill(IVFIndex(nlist=4, nprobe=1, min_train_per_list=10), vectors)
+    assert index.trained
+    assert ids(index.query_many(queries, top_k=5, nprobe=4)) == brute_force(vectors, queries, 5)
+    report = index.recall_report(queries, top_k=5, nprobe=2)
+    assert report['nlist'] == 4 and 0.0 < report['recall'] <= 1.0
+
+
+def test_ivf_is_exact_before_training(data):
+    vectors, queries = data
+    index = fill(IVFIndex(nlist=64, nprobe=1), vectors[:100])
+    assert not index.trained
+    assert ids(index.query_many(queries, top_k=3)) == brute_force(vectors[:100], queries, 3)
+
+
+def test_mmap_index_matches_brute_force_after_reopening(tmp_path, data):
+    vectors, queries = data
+    path = str(tmp_path / 'index')
+    index = fill(MmapIndex(path, chunk_rows=64), vectors[:300])
+    index.close()
+    reopened = MmapIndex(path, chunk_rows=64)
+    assert len(reopened) == 300
+    for i in range(300, 500):
+        reopened.add(f'id-{i}', vectors[i].tolist(), {'row': i})
+    assert len(reopened) == 500
+    assert ids(reopened.query_many(queries, top_k=5)) == brute_force(vectors, queries, 5)
+    reopened.close()
+
+
+def test_namespace_filter_returns_top_k_of_that_namespace_only():
+    store = VectorStore('local', 'test', embedding_model=FakeEmbedder(dim=DIM))
+    for i in range(40):
+        namespace = 'mine' if i % 10 == 0 else 'other'
+        store.add_task(f'id-{i}', store.embed_text(f'text {i}'), {'namespace': namespace, 'i': i})
+    hits = store.query_tasks('text 3', top_k=3, namespace='mine')
+    assert len(hits) == 3
+    assert all(meta['namespace'] == 'mine' for _, _, meta in hits)
+    assert len(store.query_tasks('text 3', top_k=10, namespace='mine')) == 4
+    assert store.query_tasks_many(['text 3'], top_k=2, namespace='nobody') == [[]]
+    assert len(store.query_tasks('text 3', top_k=3)) == 3
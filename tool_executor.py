@@ -0,0 +1,163 @@
+import asyncio
+import multiprocessing
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from tool_registry import ToolError, tool_registry, tool_specs
+from metrics import registry as metrics
+
+# One directive per line: "TOOL: tool_name: argument"
+TOOL_PATTERN = re.compile(r'^[ \t]*TOOL:[ \t]*([^:\n]+?)[ \t]*:[ \t]*(.*?)[ \t]*$', re.MULTILINE)
+
+# CPU-bound tools run in a process pool so they neither hold the GIL nor block I/O tools
+CPU_TOOLS = {name for name, spec in tool_specs.items() if spec.cpu}
+# Pure tools return the same output for the same argument; their outputs are memoized
+PURE_TOOLS = {name for name, spec in tool_specs.items() if spec.pure}
+
+
+def parse_tool_calls(text):
+    """Return [(tool_name, argument), ...] for every TOOL: directive line in text."""
+    return TOOL_PATTERN.findall(text)
+
+
+class ToolExecutor:
+    """
+    Runs tool calls concurrently on an asyncio event loop owned by a background thread.
+    Blocking tools run in a bounded thread pool and CPU-heavy ones (CPU_TOOLS) in a process pool.
+    Every call is subject to a timeout (per tool via `timeouts`, else `timeout`), a global concurrency
+    limit and a per-tool limit. A call that times out is cancelled if it has not started yet; the process
+    pool is restarted when a CPU tool times out, so a runaway computation does not hold a worker forever.
+    Outputs of PURE_TOOLS are kept in an LRU of memo_size entries, so a repeated call is a dict lookup.
+    """
+    def __init__(self, timeout=30, timeouts=None, max_concurrency=8, per_tool_concurrency=4, io_workers=8, cpu_workers=2,
+                 memo_size=1024):
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.max_concurrency = max_concurrency
+        self.per_tool_concurrency = per_tool_concurrency
+        self.cpu_workers = cpu_workers
+        self.thread_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='tool')
+        self.process_pool = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='tool-executor', daemon=True)
+        self.thread.start()
+        self.semaphore = None
+        self.tool_semaphores = {}
+        self.memo_size = memo_size
+        self.memo = OrderedDict()  # (tool_name, arg) -> output; only touched from the event loop thread
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def _semaphores(self, tool_name):
+        # Created lazily so they belong to the executor's own event loop
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        if tool_name not in self.tool_semaphores:
+            self.tool_semaphores[tool_name] = asyncio.Semaphore(self.per_tool_concurrency)
+        return self.semaphore, self.tool_semaphores[tool_name]
+
+    def _pool_for(self, tool_name):
+        if tool_name not in CPU_TOOLS:
+            return self.thread_pool
+        if self.process_pool is None:
+            # spawn, not fork: the agent process runs several threads
+            self.process_pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                    mp_context=multiprocessing.get_context('spawn'))
+        return self.process_pool
+
+    def _restart_process_pool(self):
+        pool, self.process_pool = self.process_pool, None
+        if pool is None:
+            return
+        for process in list(getattr(pool, '_processes', {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _call(self, tool_name, arg):
+        if tool_name not in tool_registry:
+            metrics.inc('tool_calls_total', tool=tool_name, outcome='not_found')
+            return ToolError(f"Tool '{tool_name}' not found.")
+        memo_key = (tool_name, arg) if self.memo_size and tool_name in PURE_TOOLS else None
+        if memo_key is not None:
+            if memo_key in self.memo:
+                self.memo.move_to_end(memo_key)
+                self.memo_hits += 1
+                metrics.inc('tool_calls_total', tool=tool_name, outcome='memo')
+                return self.memo[memo_key]
+            self.memo_misses += 1
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            output = await self._run_tool(tool_name, arg)
+            outcome = 'error' if isinstance(output, ToolError) else 'ok'
+            if memo_key is not None and outcome == 'ok':
+                self.memo[memo_key] = output
+                while len(self.memo) > self.memo_size:
+                    self.memo.popitem(last=False)
+            return output
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            return ToolError(f"Tool '{tool_name}' timed out after {self.timeouts.get(tool_name, self.timeout)}s")
+        finally:
+            metrics.observe('tool_seconds', time.perf_counter() - started, tool=tool_name)
+            metrics.inc('tool_calls_total', tool=tool_name, outcome=outcome)
+
+    async def _run_tool(self, tool_name, arg):
+        timeout = self.timeouts.get(tool_name, self.timeout)
+        overall, per_tool = self._semaphores(tool_name)
+        async with overall, per_tool:
+            pool = self._pool_for(tool_name)
+            future = self.loop.run_in_executor(pool, tool_registry[tool_name], arg)
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                if pool is self.process_pool:
+                    self._restart_process_pool()
+                raise
+
+    def submit(self, tool_name, arg):
+        """Schedule a tool call; returns a concurrent.futures.Future with the tool output."""
+        return asyncio.run_coroutine_threadsafe(self._call(tool_name, arg), self.loop)
+
+    def run(self, calls):
+        """Run [(tool_name, arg), ...] concurrently and return their outputs (or exceptions) in order."""
+        futures = [self.submit(name, arg) for name, arg in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def memo_stats(self):
+        lookups = self.memo_hits + self.memo_misses
+        return {
+            'entries': len(self.memo),
+            'hits': self.memo_hits,
+            'misses': self.memo_misses,
+            'hit_rate': self.memo_hits / lookups if lookups else 0.0,
+        }
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True, cancel_futures=True)
+            self.process_pool = None
+
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+
+def default_executor():
+    """Process-wide ToolExecutor with default settings, created on first use."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = ToolExecutor()
+        return _default_executor
@@ -1,6 +1,4 @@
-import requests
 import datetime
-import wikipedia
 import json
 import random
 import re
@@ -11,51 +9,141 @@ import uuid
 import csv
 from io import StringIO
 import hashlib
+import os
 import sqlite3
-
-try:
-    import markdown
-except ImportError:
-    markdown = None
-
-try:
-    import matplotlib.pyplot as plt
-except ImportError:
-    plt = None
-
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    BeautifulSoup = None
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http_client import shared_client
+
+# Optional libraries are imported inside the tools that use them.
+
+# Network tools share http_client.shared_client(): pooled keep-alive connections, a timeout on every
+# request, an on-disk response cache, and bodies that are only read as far as the tool needs.
+SCRAPE_READ_LIMIT = 200000  # characters of HTML read by web_scrape before extracting text
+
+ARG_SEPARATOR = '::'
+
+
+class ToolError(str):
+    """Output of a tool call that failed. It is still a string, so callers that only use the text are unaffected."""
+
+
+class ToolArgumentError(ValueError):
+    pass
+
+
+class ToolSpec:
+    """
+    A tool and its argument schema. The directive argument is split on '::' into the declared params in one
+    pass (the last param takes the rest), so tools receive their arguments already separated; a missing
+    argument is reported as the tool's output, like any other tool error.
+    Pure tools always return the same output for the same argument, so ToolExecutor memoizes them; cpu tools
+    run in its process pool. Specs hold no locks or caches and can be sent to worker processes.
+    """
+    def __init__(self, func, params=('arg',), pure=False, cpu=False):
+        self.name = func.__name__
+        self.func = func
+        self.params = params
+        self.pure = pure
+        self.cpu = cpu
+
+    @property
+    def usage(self):
+        return f"TOOL: {self.name}: {ARG_SEPARATOR.join(self.params)}"
+
+    def parse(self, arg):
+        if len(self.params) == 1:
+            return [arg]
+        parts = arg.split(ARG_SEPARATOR, len(self.params) - 1)
+        if len(parts) != len(self.params):
+            raise ToolArgumentError(f"expected {ARG_SEPARATOR.join(self.params)}, got {len(parts)} argument(s)")
+        return parts
+
+    def __call__(self, arg, **kwargs):
+        try:
+            args = self.parse(arg)
+        except ToolArgumentError as e:
+            return ToolError(f"{self.name} error: {e}")
+        return self.func(*args, **kwargs)
+
+
+class SQLitePool:
+    """
+    Open sqlite connections for database_query, reused across calls: up to max_per_file idle connections per
+    database file, for the max_files most recently used files. A connection is used by one call at a time.
+    """
+    def __init__(self, max_files=16, max_per_file=4):
+        self.max_files = max_files
+        self.max_per_file = max_per_file
+        self.idle = OrderedDict()  # absolute path -> [connection, ...]
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, path):
+        path = os.path.abspath(path)
+        with self.lock:
+            idle = self.idle.get(path)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+        # Leave no transaction open on a pooled connection; statements were never committed before either
+        if conn.in_transaction:
+            conn.rollback()
+        with self.lock:
+            idle = self.idle.setdefault(path, [])
+            self.idle.move_to_end(path)
+            if len(idle) < self.max_per_file:
+                idle.append(conn)
+                conn = None
+            while len(self.idle) > self.max_files:
+                for stale in self.idle.popitem(last=False)[1]:
+                    stale.close()
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for conn in connections:
+                    conn.close()
+            self.idle.clear()
+
+
+sqlite_pool = SQLitePool()
 
 # Existing tools
 
 def web_search(query):
     url = f'https://duckduckgo.com/html/?q={query}'
-    resp = requests.get(url)
+    resp = shared_client().fetch(url, limit=0)
     if resp.status_code == 200:
         return f"Web search for '{query}' completed. (HTML content omitted)"
-    return f"Web search failed for '{query}'"
+    return ToolError(f"Web search failed for '{query}'")
 
 def file_read(filepath):
     try:
         with open(filepath, 'r') as f:
             return f.read()
     except Exception as e:
-        return f"File read error: {e}"
+        return ToolError(f"File read error: {e}")
 
-def write_file(filepath_and_text):
+def write_file(filepath, text):
     try:
-        filepath, text = filepath_and_text.split('::', 1)
         with open(filepath.strip(), 'w') as f:
             f.write(text)
         return f"Wrote to {filepath.strip()}"
     except Exception as e:
-        return f"File write error: {e}"
+        return ToolError(f"File write error: {e}")
 
 def summarize_text(text, llm=None):
     if llm is None:
-        return "LLM not provided for summarization."
+        return ToolError("LLM not provided for summarization.")
     prompt = f"Summarize the following text:\n{text}"
     return llm.generate(prompt)
 
@@ -63,31 +151,24 @@ def math_calculator(expr):
     try:
         return str(eval(expr, {"__builtins__": {}}))
     except Exception as e:
-        return f"Math error: {e}"
+        return ToolError(f"Math error: {e}")
 
 def current_datetime(_):
     return datetime.datetime.now().isoformat()
 
-def send_email(args):
-    try:
-        to, subject, body = args.split('::', 2)
-        return f"Email sent to {to} with subject '{subject}'. Body: {body}"
-    except Exception as e:
-        return f"Email error: {e}"
+def send_email(to, subject, body):
+    return f"Email sent to {to} with subject '{subject}'. Body: {body}"
 
 def wikipedia_search(query):
     try:
+        import wikipedia
         return wikipedia.summary(query, sentences=2)
     except Exception as e:
-        return f"Wikipedia error: {e}"
+        return ToolError(f"Wikipedia error: {e}")
 
-def translate_text(args):
-    # args: "text::target_language" (stub)
-    try:
-        text, lang = args.split('::', 1)
-        return f"[Stub] '{text.strip()}' translated to {lang.strip()}"
-    except Exception as e:
-        return f"Translate error: {e}"
+def translate_text(text, target_language):
+    # Stub
+    return f"[Stub] '{text.strip()}' translated to {target_language.strip()}"
 
 def extract_entities(text):
     # Simple regex for capitalized words as entities
@@ -100,26 +181,25 @@ def image_generation(prompt):
 
 def url_fetch(url):
     try:
-        resp = requests.get(url)
+        resp = shared_client().fetch(url, limit=1000)
         if resp.status_code == 200:
-            return resp.text[:1000] + ('... [truncated]' if len(resp.text) > 1000 else '')
-        return f"URL fetch failed: {resp.status_code}"
+            return resp.text + ('... [truncated]' if resp.truncated else '')
+        return ToolError(f"URL fetch failed: {resp.status_code}")
     except Exception as e:
-        return f"URL fetch error: {e}"
+        return ToolError(f"URL fetch error: {e}")
 
 def json_validator(text):
     try:
         obj = json.loads(text)
         return json.dumps(obj, indent=2)
     except Exception as e:
-        return f"JSON error: {e}"
+        return ToolError(f"JSON error: {e}")
 
-def random_number(args):
+def random_number(start, end):
     try:
-        start, end = map(int, args.split('::'))
-        return str(random.randint(start, end))
+        return str(random.randint(int(start), int(end)))
     except Exception as e:
-        return f"Random number error: {e}"
+        return ToolError(f"Random number error: {e}")
 
 def weather_info(location):
     # Stub: return fake weather
@@ -131,7 +211,7 @@ def shell_command(cmd):
         result = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT, timeout=5, universal_newlines=True)
         return result[:1000] + ('... [truncated]' if len(result) > 1000 else '')
     except Exception as e:
-        return f"Shell error: {e}"
+        return ToolError(f"Shell error: {e}")
 
 def csv_reader(csv_text):
     try:
@@ -141,7 +221,7 @@ def csv_reader(csv_text):
         summary = f"CSV with {len(rows)} rows and {len(rows[0]) if rows else 0} columns. First row: {rows[0] if rows else 'N/A'}"
         return summary
     except Exception as e:
-        return f"CSV error: {e}"
+        return ToolError(f"CSV error: {e}")
 
 def timer_sleep(seconds):
     try:
@@ -149,18 +229,20 @@ def timer_sleep(seconds):
         time.sleep(min(s, 5))  # Limit to 5 seconds for safety
         return f"Slept for {min(s, 5)} seconds."
     except Exception as e:
-        return f"Sleep error: {e}"
+        return ToolError(f"Sleep error: {e}")
 
 def markdown_to_html(md_text):
-    if markdown is None:
-        return "Markdown package not installed."
+    try:
+        import markdown
+    except ImportError:
+        return ToolError("Markdown package not installed.")
     try:
         return markdown.markdown(md_text)
     except Exception as e:
-        return f"Markdown error: {e}"
+        return ToolError(f"Markdown error: {e}")
 
-def unit_converter(args):
-    # args: "value::from_unit::to_unit" (very simple, only a few units)
+def unit_converter(value, from_unit, to_unit):
+    # Very simple, only a few units
     conversions = {
         ('meters', 'feet'): lambda v: v * 3.28084,
         ('feet', 'meters'): lambda v: v / 3.28084,
@@ -168,26 +250,25 @@ def unit_converter(args):
         ('fahrenheit', 'celsius'): lambda v: (v - 32) * 5/9,
     }
     try:
-        value, from_unit, to_unit = args.split('::')
         value = float(value)
         key = (from_unit.strip().lower(), to_unit.strip().lower())
         if key in conversions:
             return str(conversions[key](value))
-        return f"Conversion not supported: {from_unit} to {to_unit}"
+        return ToolError(f"Conversion not supported: {from_unit} to {to_unit}")
     except Exception as e:
-        return f"Unit conversion error: {e}"
+        return ToolError(f"Unit conversion error: {e}")
 
 def base64_encode(text):
     try:
         return base64.b64encode(text.encode()).decode()
     except Exception as e:
-        return f"Base64 encode error: {e}"
+        return ToolError(f"Base64 encode error: {e}")
 
 def base64_decode(text):
     try:
         return base64.b64decode(text.encode()).decode()
     except Exception as e:
-        return f"Base64 decode error: {e}"
+        return ToolError(f"Base64 decode error: {e}")
 
 def uuid_generator(_):
     return str(uuid.uuid4())
@@ -202,16 +283,12 @@ def password_generator(length):
         chars = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*()'
         return ''.join(random.choice(chars) for _ in range(min(length, 100)))
     except Exception as e:
-        return f"Password error: {e}"
+        return ToolError(f"Password error: {e}")
 
-def zip_file_creator(args):
-    # args: "zipname.zip::file1.txt,file2.txt" (stub)
-    try:
-        zipname, files = args.split('::', 1)
-        file_list = [f.strip() for f in files.split(',')]
-        return f"[Stub] Created zip {zipname} with files: {file_list}"
-    except Exception as e:
-        return f"Zip error: {e}"
+def zip_file_creator(zipname, files):
+    # files: "file1.txt,file2.txt" (stub)
+    file_list = [f.strip() for f in files.split(',')]
+    return f"[Stub] Created zip {zipname} with files: {file_list}"
 
 def pdf_text_extractor(filepath):
     # Stub: just return a message
@@ -225,13 +302,12 @@ def html_title_extractor(html):
     match = re.search(r'<title>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
     return match.group(1).strip() if match else 'No title found.'
 
-def currency_converter(args):
-    # args: "amount::from_currency::to_currency" (stub)
+def currency_converter(amount, from_currency, to_currency):
+    # Stub
     try:
-        amount, from_cur, to_cur = args.split('::')
-        return f"[Stub] {amount} {from_cur} = {float(amount) * 1.1:.2f} {to_cur} (fake rate)"
+        return f"[Stub] {amount} {from_currency} = {float(amount) * 1.1:.2f} {to_currency} (fake rate)"
     except Exception as e:
-        return f"Currency conversion error: {e}"
+        return ToolError(f"Currency conversion error: {e}")
 
 def ip_geolocation(ip):
     # Stub: return fake location
@@ -243,10 +319,9 @@ def url_shortener(url):
 
 def http_status_checker(url):
     try:
-        resp = requests.get(url)
-        return f"HTTP status for {url}: {resp.status_code}"
+        return f"HTTP status for {url}: {shared_client().status(url)}"
     except Exception as e:
-        return f"HTTP status error: {e}"
+        return ToolError(f"HTTP status error: {e}")
 
 def prime_number_checker(n):
     try:
@@ -258,7 +333,7 @@ def prime_number_checker(n):
                 return 'False'
         return 'True'
     except Exception as e:
-        return f"Prime check error: {e}"
+        return ToolError(f"Prime check error: {e}")
 
 def fibonacci_calculator(n):
     try:
@@ -268,7 +343,7 @@ def fibonacci_calculator(n):
             a, b = b, a + b
         return str(a)
     except Exception as e:
-        return f"Fibonacci error: {e}"
+        return ToolError(f"Fibonacci error: {e}")
 
 def anagram_finder(word):
     # Very simple: return reversed word as a fake anagram
@@ -286,10 +361,9 @@ def palindrome_generator(text):
     s = re.sub(r'[^A-Za-z0-9]', '', text.lower())
     return text + s[::-1]
 
-def caesar_cipher(args):
-    # args: "text::shift" (encode only)
+def caesar_cipher(text, shift):
+    # Encode only
     try:
-        text, shift = args.split('::')
         shift = int(shift) % 26
         def shift_char(c):
             if 'a' <= c <= 'z':
@@ -299,23 +373,24 @@ def caesar_cipher(args):
             return c
         return ''.join(shift_char(c) for c in text)
     except Exception as e:
-        return f"Caesar cipher error: {e}"
+        return ToolError(f"Caesar cipher error: {e}")
 
 def morse_code_encoder(text):
     MORSE = {'A':'.-', 'B':'-...', 'C':'-.-.', 'D':'-..', 'E':'.', 'F':'..-.', 'G':'--.', 'H':'....', 'I':'..', 'J':'.---', 'K':'-.-', 'L':'.-..', 'M':'--', 'N':'-.', 'O':'---', 'P':'.--.', 'Q':'--.-', 'R':'.-.', 'S':'...', 'T':'-', 'U':'..-', 'V':'...-', 'W':'.--', 'X':'-..-', 'Y':'-.--', 'Z':'--..', '1':'.----', '2':'..---', '3':'...--', '4':'....-', '5':'.....', '6':'-....', '7':'--...', '8':'---..', '9':'----.', '0':'-----', ' ':'/'}
     try:
         return ' '.join(MORSE.get(c.upper(), '?') for c in text)
     except Exception as e:
-        return f"Morse code error: {e}"
+        return ToolError(f"Morse code error: {e}")
 
-def plot_data(args):
-    # args: "x1,x2,x3::y1,y2,y3::title"; saves to plot.png
-    if plt is None:
-        return "matplotlib not installed."
+def plot_data(x_values, y_values, title):
+    # x_values, y_values: "x1,x2,x3", "y1,y2,y3"; saves to plot.png
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return ToolError("matplotlib not installed.")
     try:
-        x_str, y_str, title = args.split('::')
-        x = [float(i) for i in x_str.split(',')]
-        y = [float(i) for i in y_str.split(',')]
+        x = [float(i) for i in x_values.split(',')]
+        y = [float(i) for i in y_values.split(',')]
         plt.figure()
         plt.plot(x, y, marker='o')
         plt.title(title)
@@ -325,87 +400,87 @@ def plot_data(args):
         plt.close()
         return "Plot saved to plot.png"
     except Exception as e:
-        return f"Plot error: {e}"
+        return ToolError(f"Plot error: {e}")
 
 def web_scrape(url):
-    if BeautifulSoup is None:
-        return "BeautifulSoup not installed."
     try:
-        resp = requests.get(url)
+        from bs4 import BeautifulSoup
+    except ImportError:
+        return ToolError("BeautifulSoup not installed.")
+    try:
+        resp = shared_client().fetch(url, limit=SCRAPE_READ_LIMIT)
         if resp.status_code != 200:
-            return f"Web scrape failed: {resp.status_code}"
+            return ToolError(f"Web scrape failed: {resp.status_code}")
         soup = BeautifulSoup(resp.text, 'html.parser')
         text = soup.get_text(separator=' ', strip=True)
         return text[:1000] + ('... [truncated]' if len(text) > 1000 else '')
     except Exception as e:
-        return f"Web scrape error: {e}"
+        return ToolError(f"Web scrape error: {e}")
 
-def database_query(args):
-    # args: "dbfile.sqlite::SELECT ..."
+def database_query(dbfile, query):
     try:
-        dbfile, query = args.split('::', 1)
-        conn = sqlite3.connect(dbfile.strip())
-        cur = conn.cursor()
-        cur.execute(query)
-        rows = cur.fetchall()
-        conn.close()
+        with sqlite_pool.connection(dbfile.strip()) as conn:
+            rows = conn.execute(query).fetchall()
         return json.dumps(rows)
     except Exception as e:
-        return f"Database error: {e}"
+        return ToolError(f"Database error: {e}")
 
 def ai_image_generate(prompt):
     # Stub: just return a placeholder path
     return f"[Stub] AI image generated for prompt: '{prompt}'. Saved to /tmp/ai_image.png"
 
-tool_registry = {
-    'web_search': web_search,
-    'file_read': file_read,
-    'write_file': write_file,
-    'summarize_text': summarize_text,
-    'math_calculator': math_calculator,
-    'current_datetime': current_datetime,
-    'send_email': send_email,
-    'wikipedia_search': wikipedia_search,
-    'translate_text': translate_text,
-    'extract_entities': extract_entities,
-    'image_generation': image_generation,
-    'url_fetch': url_fetch,
-    'json_validator': json_validator,
-    'random_number': random_number,
-    'weather_info': weather_info,
-    'shell_command': shell_command,
-    'csv_reader': csv_reader,
-    'timer_sleep': timer_sleep,
-    'markdown_to_html': markdown_to_html,
-    'unit_converter': unit_converter,
-    'base64_encode': base64_encode,
-    'base64_decode': base64_decode,
-    'uuid_generator': uuid_generator,
-    'palindrome_checker': palindrome_checker,
-    'password_generator': password_generator,
-    'zip_file_creator': zip_file_creator,
-    'pdf_text_extractor': pdf_text_extractor,
-    'image_to_text': image_to_text,
-    'html_title_extractor': html_title_extractor,
-    'currency_converter': currency_converter,
-    'ip_geolocation': ip_geolocation,
-    'url_shortener': url_shortener,
-    'http_status_checker': http_status_checker,
-    'prime_number_checker': prime_number_checker,
-    'fibonacci_calculator': fibonacci_calculator,
-    'anagram_finder': anagram_finder,
-    'sha256_hasher': sha256_hasher,
-    'rot13_encoder': rot13_encoder,
-    'palindrome_generator': palindrome_generator,
-    'caesar_cipher': caesar_cipher,
-    'morse_code_encoder': morse_code_encoder,
-    'plot_data': plot_data,
-    'web_scrape': web_scrape,
-    'database_query': database_query,
-    'ai_image_generate': ai_image_generate,
-}
+tool_specs = {spec.name: spec for spec in [
+    ToolSpec(web_search, ('query',)),
+    ToolSpec(file_read, ('filepath',)),
+    ToolSpec(write_file, ('filepath', 'text')),
+    ToolSpec(summarize_text, ('text',)),
+    ToolSpec(math_calculator, ('expression',), pure=True),
+    ToolSpec(current_datetime, ('_',)),
+    ToolSpec(send_email, ('to', 'subject', 'body')),
+    ToolSpec(wikipedia_search, ('query',)),
+    ToolSpec(translate_text, ('text', 'target_language')),
+    ToolSpec(extract_entities, ('text',), pure=True),
+    ToolSpec(image_generation, ('prompt',)),
+    ToolSpec(url_fetch, ('url',)),
+    ToolSpec(json_validator, ('text',), pure=True),
+    ToolSpec(random_number, ('start', 'end')),
+    ToolSpec(weather_info, ('location',)),
+    ToolSpec(shell_command, ('command',)),
+    ToolSpec(csv_reader, ('csv_text',)),
+    ToolSpec(timer_sleep, ('seconds',)),
+    ToolSpec(markdown_to_html, ('markdown',), pure=True),
+    ToolSpec(unit_converter, ('value', 'from_unit', 'to_unit'), pure=True),
+    ToolSpec(base64_encode, ('text',), pure=True),
+    ToolSpec(base64_decode, ('text',), pure=True),
+    ToolSpec(uuid_generator, ('_',)),
+    ToolSpec(palindrome_checker, ('text',), pure=True),
+    ToolSpec(password_generator, ('length',)),
+    ToolSpec(zip_file_creator, ('zipname', 'files')),
+    ToolSpec(pdf_text_extractor, ('filepath',)),
+    ToolSpec(image_to_text, ('filepath',)),
+    ToolSpec(html_title_extractor, ('html',), pure=True),
+    ToolSpec(currency_converter, ('amount', 'from_currency', 'to_currency')),
+    ToolSpec(ip_geolocation, ('ip',)),
+    ToolSpec(url_shortener, ('url',)),
+    ToolSpec(http_status_checker, ('url',)),
+    ToolSpec(prime_number_checker, ('n',), pure=True, cpu=True),
+    ToolSpec(fibonacci_calculator, ('n',), pure=True, cpu=True),
+    ToolSpec(anagram_finder, ('word',), pure=True),
+    ToolSpec(sha256_hasher, ('text',), pure=True),
+    ToolSpec(rot13_encoder, ('text',), pure=True),
+    ToolSpec(palindrome_generator, ('text',), pure=True),
+    ToolSpec(caesar_cipher, ('text', 'shift'), pure=True),
+    ToolSpec(morse_code_encoder, ('text',), pure=True),
+    ToolSpec(plot_data, ('x_values', 'y_values', 'title'), cpu=True),
+    ToolSpec(web_scrape, ('url',)),
+    ToolSpec(database_query, ('dbfile', 'query')),
+    ToolSpec(ai_image_generate, ('prompt',)),
+]}
+
+# name -> callable taking the raw directive argument
+tool_registry = dict(tool_specs)
 
 def call_tool(tool_name, *args, **kwargs):
     if tool_name in tool_registry:
         return tool_registry[tool_name](*args, **kwargs)
-    return f"Tool '{tool_name}' not found." 
\ No newline at end of file
+    return ToolError(f"Tool '{tool_name}' not found.")
@@ -1,41 +1,211 @@
 import os
-import pinecone
-from sentence_transformers import SentenceTransformer
+import threading
+import numpy as np
+from embedding_cache import EmbeddingCache
+from lazy_loader import record_time
+
+
+def normalize_rows(vectors):
+    """Return float32 copies of the given vectors scaled to unit length (rows of a 2-D array)."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / (norms + 1e-8)
+
+
+def top_k_rows(scores, top_k):
+    """Indices of the top_k highest scores in each row of a 2-D score matrix, best first."""
+    n = scores.shape[1]
+    k = min(top_k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.tile(np.arange(n), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1)
+    return np.take_along_axis(idx, order, axis=1)
+
+
+class MatrixIndex:
+    """
+    Exact cosine-similarity index for the local provider.
+    Embeddings live in a preallocated float32 matrix with pre-normalized rows that doubles in
+    size when full, so a query is one matrix-vector product plus an argpartition for top-k.
+    """
+    def __init__(self, dim=None, capacity=1024):
+        self.dim = dim
+        self.capacity = capacity
+        self.vectors = None
+        self.ids = []
+        self.metadata = []
+        self.rows = {}  # task_id -> row in self.vectors
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _reserve(self, size):
+        if self.vectors is None:
+            self.capacity = max(self.capacity, size)
+            self.vectors = np.zeros((self.capacity, self.dim), dtype=np.float32)
+        elif size > self.capacity:
+            while self.capacity < size:
+                self.capacity *= 2
+            grown = np.zeros((self.capacity, self.dim), dtype=np.float32)
+            grown[:len(self.ids)] = self.vectors[:len(self.ids)]
+            self.vectors = grown
+
+    def add(self, task_id, embedding, metadata):
+        vector = normalize_rows(embedding)[0]
+        if self.dim is None:
+            self.dim = vector.shape[0]
+        elif vector.shape[0] != self.dim:
+            raise ValueError(f"Embedding dimension {vector.shape[0]} does not match index dimension {self.dim}")
+        if task_id in self.rows:
+            row = self.rows[task_id]
+            self.metadata[row] = metadata
+        else:
+            row = len(self.ids)
+            self._reserve(row + 1)
+            self.rows[task_id] = row
+            self.ids.append(task_id)
+            self.metadata.append(metadata)
+        self.vectors[row] = vector
+
+    def query(self, embedding, top_k=3):
+        return self.query_many([embedding], top_k=top_k)[0]
+
+    def query_many(self, embeddings, top_k=3):
+        queries = normalize_rows(embeddings)
+        if not self.ids:
+            return [[] for _ in range(len(queries))]
+        scores = queries @ self.vectors[:len(self.ids)].T
+        results = []
+        for q, rows in enumerate(top_k_rows(scores, top_k)):
+            results.append([(float(scores[q, r]), self.ids[r], self.metadata[r]) for r in rows])
+        return results
+
 
 class VectorStore:
-    def __init__(self, provider, index_name, api_key=None, embedding_model_name='all-MiniLM-L6-v2'):
+    """
+    Task embeddings and metadata in Pinecone or a local index (exact, ivf or mmap). Texts are encoded with a
+    SentenceTransformer, or with embedding_model when one is given (any object with encode(texts, batch_size)
+    and get_sentence_embedding_dimension(), e.g. the deterministic stub used by the benchmarks).
+    """
+    def __init__(self, provider, index_name, api_key=None, embedding_model_name='all-MiniLM-L6-v2', index_options=None,
+                 embedding_cache=None, embed_batch_size=32, embedding_model=None):
         self.provider = provider
         self.index_name = index_name
-        self.embedding_model = SentenceTransformer(embedding_model_name)
-        if provider == 'pinecone':
-            pinecone.init(api_key=api_key, environment="us-east1-gcp")
-            if index_name not in pinecone.list_indexes():
-                pinecone.create_index(index_name, dimension=384)
-            self.index = pinecone.Index(index_name)
+        self.persistent = provider in ('pinecone', 'mmap')  # entries outlive the process
+        self.load_times = {}  # stage -> seconds, reported by babyagi.py --profile-startup
+        if embedding_model is not None:
+            self.embedding_model = embedding_model
         else:
-            self.index = {}
+            with record_time(self.load_times, 'import sentence_transformers'):
+                from sentence_transformers import SentenceTransformer
+            with record_time(self.load_times, 'load embedding model'):
+                self.embedding_model = SentenceTransformer(embedding_model_name)
+        self.embedding_cache = embedding_cache or EmbeddingCache(namespace=embedding_model_name)
+        self.embed_batch_size = embed_batch_size
+        self.dimension = self.embedding_model.get_sentence_embedding_dimension()
+        self.lock = threading.RLock()
+        with record_time(self.load_times, 'open index'):
+            if provider == 'pinecone':
+                import pinecone
+                pinecone.init(api_key=api_key, environment="us-east1-gcp")
+                if index_name not in pinecone.list_indexes():
+                    pinecone.create_index(index_name, dimension=self.dimension)
+                else:
+                    self._check_dimension(pinecone.describe_index(index_name).dimension)
+                self.index = pinecone.Index(index_name)
+            elif provider == 'ivf':
+                from ivf_index import IVFIndex
+                self.index = IVFIndex(**(index_options or {}))
+            elif provider == 'mmap':
+                from mmap_index import MmapIndex
+                self.index = MmapIndex(**(index_options or {}))
+                if self.index.dim is not None:
+                    self._check_dimension(self.index.dim)
+            else:
+                self.index = MatrixIndex(dim=self.dimension)
+
+    def _check_dimension(self, index_dimension):
+        if index_dimension != self.dimension:
+            raise ValueError(
+                f"Vector index '{self.index_name}' has dimension {index_dimension}, but embedding model "
+                f"produces {self.dimension}-d vectors")
 
     def embed_text(self, text):
-        return self.embedding_model.encode(text).tolist()
+        return self.embed_many([text])[0].tolist()
+
+    def embed_many(self, texts):
+        """
+        Embed a list of texts, returning a float32 array of shape (len(texts), dim).
+        Cached embeddings are reused; the remaining distinct texts are encoded in a single batched call.
+        """
+        texts = list(texts)
+        vectors = self.embedding_cache.get_many(texts)
+        pending = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if pending:
+            encoded = self.embedding_model.encode(pending, batch_size=self.embed_batch_size)
+            encoded = np.asarray(encoded, dtype=np.float32)
+            self.embedding_cache.put_many(pending, encoded)
+            by_text = dict(zip(pending, encoded))
+            vectors = [by_text[t] if v is None else v for t, v in zip(texts, vectors)]
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
 
     def add_task(self, task_id, embedding, metadata):
+        if len(embedding) != self.dimension:
+            raise ValueError(f"Embedding has dimension {len(embedding)}, expected {self.dimension}")
         if self.provider == 'pinecone':
             self.index.upsert([(task_id, embedding, metadata)])
         else:
-            self.index[task_id] = (embedding, metadata)
+            with self.lock:
+                self.index.add(task_id, embedding, metadata)
+
+    def _pinecone_query(self, embedding, top_k, namespace=None):
+        extra = {'filter': {'namespace': namespace}} if namespace is not None else {}
+        response = self.index.query(embedding, top_k=top_k, include_metadata=True, **extra)
+        return [(m['score'], m['id'], m.get('metadata')) for m in response['matches']]
 
-    def query_tasks(self, text, top_k=3):
+    def _local_query_many(self, embeddings, top_k, namespace=None):
+        # Local indexes do not filter: fetch more hits until top_k of them are in the namespace or the index runs out
+        with self.lock:
+            if namespace is None:
+                return self.index.query_many(embeddings, top_k=top_k)
+            fetch = top_k * 4
+            while True:
+                results = self.index.query_many(embeddings, top_k=fetch)
+                matched = [[hit for hit in hits if hit[2] and hit[2].get('namespace') == namespace][:top_k]
+                           for hits in results]
+                if all(len(m) >= top_k or len(hits) < fetch for m, hits in zip(matched, results)):
+                    return matched
+                fetch *= 4
+
+    def query_tasks(self, text, top_k=3, namespace=None):
+        """
+        Search by cosine similarity: returns [(similarity, task_id, metadata), ...], best first.
+        With a namespace, only entries whose metadata has that 'namespace' are returned.
+        """
         embedding = self.embed_text(text)
         if self.provider == 'pinecone':
-            return self.index.query(embedding, top_k=top_k, include_metadata=True)
+            return self._pinecone_query(embedding, top_k, namespace)
         else:
-            # Simple local search by cosine similarity
-            from numpy import dot
-            from numpy.linalg import norm
-            import numpy as np
-            results = []
-            for tid, (emb, meta) in self.index.items():
-                sim = dot(embedding, emb) / (norm(embedding) * norm(emb) + 1e-8)
-                results.append((sim, tid, meta))
-            results.sort(reverse=True)
-            return results[:top_k] 
\ No newline at end of file
+            return self._local_query_many([embedding], top_k, namespace)[0]
+
+    def query_tasks_many(self, texts, top_k=3, namespace=None):
+        """Query several texts at once; the local provider scores them all in a single matmul."""
+        embeddings = self.embed_many(texts)
+        if self.provider == 'pinecone':
+            return [self._pinecone_query(e.tolist(), top_k, namespace) for e in embeddings]
+        else:
+            return self._local_query_many(embeddings, top_k, namespace)
+
+    def recall_report(self, texts, top_k=10):
+        """recall@k of the approximate (ivf) provider against exact search over the same vectors."""
+        if self.provider != 'ivf':
+            raise ValueError(f"recall_report requires the 'ivf' provider, not '{self.provider}'")
+        embeddings = self.embed_many(texts)
+        with self.lock:
+            return self.index.recall_report(embeddings, top_k=top_k)
@@ -1,37 +1,401 @@
-from flask import Flask, render_template_string
+import argparse
+import collections
+import itertools
+import json
+import queue
 import threading
+import time
+import uuid
+from flask import Flask, Response, jsonify, redirect, request
+from agent_runtime import AgentRuntime, load_config
+from metrics import registry as metrics
 
 app = Flask(__name__)
 
-# Dummy state for stub
-state = {
-    'running': False,
-    'current_tasks': [],
-    'completed_tasks': []
-}
+STREAMED_EVENTS = {'GENERATE_TASKS', 'GENERATE_TASK_GRAPH', 'EXECUTE_TASK', 'FEEDBACK', 'TOOL_USE', 'TOOL_ERROR',
+                   'TASK_ERROR', 'RUN_COMPLETE', 'STOP_REQUESTED'}
+MAX_FIELD_CHARS = 2000  # long results are cut in events; the task API returns them in full
+
+
+class EventHub:
+    """
+    Fan-out of agent events to SSE subscribers. Every event gets an increasing id, and the last `history` events
+    are kept so a reconnecting browser (Last-Event-ID) only receives what it missed. A subscriber that falls
+    more than max_queue events behind is dropped rather than slowing down the agent.
+    """
+    def __init__(self, history=1000, max_queue=1000):
+        self.ids = itertools.count(1)
+        self.history = collections.deque(maxlen=history)
+        self.subscribers = set()
+        self.max_queue = max_queue
+        self.lock = threading.Lock()
+
+    def publish(self, data):
+        with self.lock:
+            event = (next(self.ids), json.dumps(data, default=str))
+            self.history.append(event)
+            for subscriber in list(self.subscribers):
+                if subscriber.qsize() >= self.max_queue:
+                    # the spare slot is kept free for this sentinel, so put_nowait cannot block or fail
+                    self.subscribers.discard(subscriber)
+                    subscriber.put_nowait(None)  # unblocks the stream so it can end
+                else:
+                    subscriber.put_nowait(event)
+
+    def subscribe(self, last_id=0):
+        subscriber = queue.Queue(maxsize=self.max_queue + 1)
+        with self.lock:
+            missed = [event for event in self.history if event[0] > last_id]
+            for event in missed[-self.max_queue:]:
+                subscriber.put_nowait(event)
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+
+class AgentService:
+    """
+    Runs submitted objectives on real TaskManagers over one shared AgentRuntime, up to `concurrency` at a time
+    on background threads. Each objective keeps its completed tasks in memory; its events are published to the hub.
+    """
+    def __init__(self, runtime, concurrency=2, workers=4, dag=False):
+        self.runtime = runtime
+        self.workers = workers
+        self.dag = dag
+        self.hub = EventHub()
+        self.objectives = collections.OrderedDict()  # id -> {'id', 'objective', 'status', 'manager', ...}
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._run, name=f'agent-{n}', daemon=True) for n in range(concurrency)]
+        for thread in self.threads:
+            thread.start()
+
+    def _publish(self, objective_id, data):
+        fields = {k: (v[:MAX_FIELD_CHARS] if isinstance(v, str) else v) for k, v in data.items()}
+        self.hub.publish(dict(fields, objective_id=objective_id, ts=time.time()))
+
+    def submit(self, objective):
+        objective_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            self.objectives[objective_id] = {'id': objective_id, 'objective': objective, 'status': 'queued',
+                                             'manager': None, 'submitted': time.time()}
+        self.queue.put(objective_id)
+        self._publish(objective_id, {'event': 'OBJECTIVE_QUEUED', 'objective': objective})
+        return objective_id
+
+    def stop(self, objective_id):
+        """Stop a queued or running objective; returns its status, or None if the id is unknown."""
+        with self.lock:
+            entry = self.objectives.get(objective_id)
+            if entry is None:
+                return None
+            if entry['status'] == 'queued':
+                entry['status'] = 'stopped'
+            elif entry['status'] == 'running':
+                entry['status'] = 'stopping'
+                if entry['manager'] is not None:  # otherwise _run stops it once it is built
+                    entry['manager'].request_stop()
+            else:
+                return entry['status']  # already finished or stopping
+            status = entry['status']
+        self._publish(objective_id, {'event': 'OBJECTIVE_' + status.upper()})
+        return status
+
+    def stop_all(self):
+        with self.lock:
+            active = [e['id'] for e in self.objectives.values() if e['status'] in ('queued', 'running')]
+        for objective_id in active:
+            self.stop(objective_id)
+
+    def _run(self):
+        while True:
+            objective_id = self.queue.get()
+            with self.lock:
+                entry = self.objectives[objective_id]
+                if entry['status'] != 'queued':
+                    continue
+                entry.update(status='running', started=time.time())
+            try:
+                manager = self.runtime.make_objective_manager()
+                manager.add_listener(lambda data, oid=objective_id: self._on_event(oid, data))
+                with self.lock:
+                    entry['manager'] = manager
+                    stop_requested = entry['status'] == 'stopping'
+                if stop_requested:
+                    manager.request_stop()
+                self._publish(objective_id, {'event': 'OBJECTIVE_STARTED', 'objective': entry['objective']})
+                if self.dag:
+                    manager.run_graph(entry['objective'], max_parallel=self.workers,
+                                      max_executions=self.runtime.max_executions)
+                else:
+                    manager.run_concurrent(entry['objective'], workers=self.workers,
+                                           max_executions=self.runtime.max_executions)
+                status = 'stopped' if manager.stop_requested.is_set() else 'done'
+            except Exception as e:
+                status = 'error'
+                entry['error'] = str(e)
+            with self.lock:
+                entry.update(status=status, finished=time.time())
+            self._publish(objective_id, {'event': 'OBJECTIVE_' + status.upper(), 'error': entry.get('error')})
+
+    def _on_event(self, objective_id, data):
+        if data['event'] in STREAMED_EVENTS:
+            self._publish(objective_id, data)
+
+    def summary(self, entry):
+        manager = entry['manager']
+        return {
+            'id': entry['id'],
+            'objective': entry['objective'],
+            'status': entry['status'],
+            'error': entry.get('error'),
+            'pending': len(manager.tasks) if manager is not None else 0,
+            'running': len(manager.running) if manager is not None else 0,
+            'completed': len(manager.completed) if manager is not None else 0,
+        }
+
+    def tasks(self, objective_id, state, offset, limit):
+        """One page of an objective's pending or completed tasks, and the total count."""
+        entry = self.objectives[objective_id]
+        manager = entry['manager']
+        if manager is None:
+            return [], 0
+        with manager.lock:
+            if state == 'completed':
+                items = manager.completed[offset:offset + limit]
+                total = len(manager.completed)
+            elif state == 'running':
+                items = [{'task': task} for task in manager.running]
+                total = len(items)
+            else:
+                pending = list(manager.tasks)
+                items = [{'task': task} for task in pending[offset:offset + limit]]
+                total = len(pending)
+        return items, total
+
+
+service = None
+service_lock = threading.Lock()
+
+
+def get_service():
+    """The AgentService, built from config.yaml on first use unless main() has already built it."""
+    global service
+    if service is None:
+        with service_lock:  # concurrent first requests must not load the models twice
+            if service is None:
+                service = AgentService(AgentRuntime(load_config(), batching=True))
+    return service
+
+
+def page_arguments():
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    return offset, limit
+
 
 @app.route('/')
 def index():
-    return render_template_string('''
-    <h1>BabyAGI Web UI (Stub)</h1>
-    <p>Status: {{ 'Running' if running else 'Stopped' }}</p>
-    <h2>Current Tasks</h2>
-    <ul>{% for t in current_tasks %}<li>{{ t }}</li>{% endfor %}</ul>
-    <h2>Completed Tasks</h2>
-    <ul>{% for t in completed_tasks %}<li>{{ t }}</li>{% endfor %}</ul>
-    <form method="post" action="/start"><button type="submit">Start</button></form>
-    <form method="post" action="/stop"><button type="submit">Stop</button></form>
-    ''', running=state['running'], current_tasks=state['current_tasks'], completed_tasks=state['completed_tasks'])
+    return Response(INDEX_HTML, mimetype='text/html')
+
+
+@app.route('/api/objectives', methods=['GET'])
+def list_objectives():
+    agents = get_service()
+    offset, limit = page_arguments()
+    with agents.lock:
+        entries = list(agents.objectives.values())
+    return jsonify({'total': len(entries), 'offset': offset,
+                    'objectives': [agents.summary(e) for e in entries[offset:offset + limit]]})
+
+
+@app.route('/api/objectives', methods=['POST'])
+def submit_objective():
+    data = request.get_json(silent=True) or {}
+    objective = (data.get('objective') or '').strip()
+    if not objective:
+        return jsonify({'error': "'objective' is required"}), 400
+    objective_id = get_service().submit(objective)
+    return jsonify({'id': objective_id, 'status': 'queued'}), 202
+
+
+@app.route('/api/objectives/<objective_id>', methods=['GET'])
+def objective_status(objective_id):
+    agents = get_service()
+    if objective_id not in agents.objectives:
+        return jsonify({'error': 'unknown objective'}), 404
+    return jsonify(agents.summary(agents.objectives[objective_id]))
+
+
+@app.route('/api/objectives/<objective_id>/tasks', methods=['GET'])
+def objective_tasks(objective_id):
+    agents = get_service()
+    if objective_id not in agents.objectives:
+        return jsonify({'error': 'unknown objective'}), 404
+    state = request.args.get('state', 'pending')
+    if state not in ('pending', 'running', 'completed'):
+        return jsonify({'error': "state must be pending, running or completed"}), 400
+    offset, limit = page_arguments()
+    items, total = agents.tasks(objective_id, state, offset, limit)
+    return jsonify({'state': state, 'total': total, 'offset': offset, 'tasks': items})
+
+
+@app.route('/api/objectives/<objective_id>/stop', methods=['POST'])
+def stop_objective(objective_id):
+    status = get_service().stop(objective_id)
+    if status is None:
+        return jsonify({'error': 'unknown objective'}), 404
+    return jsonify({'id': objective_id, 'status': status})
+
+
+@app.route('/events')
+def events():
+    """Server-sent events: one 'data:' JSON message per agent event, with keep-alive comments when idle."""
+    hub = get_service().hub
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('last_id', 0, type=int)
+    subscriber = hub.subscribe(last_id)
+
+    def stream():
+        try:
+            while True:
+                try:
+                    event = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if event is None:
+                    return
+                yield f"id: {event[0]}\ndata: {event[1]}\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timings, tool latency and errors, LLM tokens and cache hit rates in the Prometheus text format."""
+    return Response(metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
 
 @app.route('/start', methods=['POST'])
 def start():
-    state['running'] = True
-    return index()
+    objective = (request.form.get('objective') or '').strip()
+    if objective:
+        get_service().submit(objective)
+    return redirect('/')
+
 
 @app.route('/stop', methods=['POST'])
 def stop():
-    state['running'] = False
-    return index()
+    get_service().stop_all()
+    return redirect('/')
+
+
+INDEX_HTML = '''<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>BabyAGI Web UI</title>
+<style>
+  body { font-family: sans-serif; margin: 2em; }
+  .objective { border: 1px solid #ccc; padding: 0.5em 1em; margin-bottom: 1em; }
+  .status { font-weight: bold; }
+  #events { height: 20em; overflow-y: auto; background: #f6f6f6; font-family: monospace; white-space: pre-wrap; }
+  li pre { white-space: pre-wrap; margin: 0.2em 0; }
+</style>
+</head>
+<body>
+<h1>BabyAGI Web UI</h1>
+<form id="submit"><input id="objective" size="60" placeholder="Objective"> <button>Start</button></form>
+<form method="post" action="/stop"><button type="submit">Stop all</button></form>
+<h2>Objectives</h2>
+<div id="objectives"></div>
+<h2>Events</h2>
+<div id="events"></div>
+<script>
+const PAGE = 20;
+const objectives = {};
+
+function el(tag, text) { const e = document.createElement(tag); if (text !== undefined) e.textContent = text; return e; }
+
+function render(summary) {
+  let box = objectives[summary.id];
+  if (!box) {
+    box = objectives[summary.id] = el('div');
+    box.className = 'objective';
+    box.append(el('h3', summary.objective), el('span'), el('button', 'Stop'));
+    box.children[2].onclick = () => fetch(`/api/objectives/${summary.id}/stop`, {method: 'POST'});
+    for (const state of ['pending', 'completed']) {
+      const section = el('details'); section.dataset.state = state;
+      section.append(el('summary', state), el('ul'), el('button', 'Load more'));
+      section.children[2].onclick = () => loadTasks(summary.id, section, false);
+      section.ontoggle = () => section.open && loadTasks(summary.id, section, true);
+      box.append(section);
+    }
+    document.getElementById('objectives').prepend(box);
+  }
+  box.children[1].innerHTML = '';
+  box.children[1].append(el('span', summary.status), el('span',
+    ` - pending ${summary.pending}, running ${summary.running}, completed ${summary.completed}`));
+  box.children[1].firstChild.className = 'status';
+}
+
+async function loadTasks(id, section, reset) {
+  const list = section.children[1];
+  if (reset) list.innerHTML = '';
+  const page = await (await fetch(`/api/objectives/${id}/tasks?state=${section.dataset.state}` +
+                                  `&offset=${list.children.length}&limit=${PAGE}`)).json();
+  for (const t of page.tasks) {
+    const item = el('li', t.task);
+    if (t.result !== undefined) item.append(el('pre', t.result));
+    list.append(item);
+  }
+  section.children[2].hidden = list.children.length >= page.total;
+}
+
+async function refresh(id) { render(await (await fetch(`/api/objectives/${id}`)).json()); }
+
+document.getElementById('submit').onsubmit = async (e) => {
+  e.preventDefault();
+  const input = document.getElementById('objective');
+  if (!input.value.trim()) return;
+  await fetch('/api/objectives', {method: 'POST', headers: {'Content-Type': 'application/json'},
+                                  body: JSON.stringify({objective: input.value})});
+  input.value = '';
+};
+
+fetch(`/api/objectives?limit=${PAGE}`).then(r => r.json()).then(d => d.objectives.reverse().forEach(render));
+
+const log = document.getElementById('events');
+const source = new EventSource('/events');
+source.onmessage = (message) => {
+  const data = JSON.parse(message.data);
+  const line = el('div', `[${data.event}] ${data.task || data.objective || data.message || ''}`);
+  log.append(line);
+  while (log.children.length > 500) log.firstChild.remove();
+  log.scrollTop = log.scrollHeight;
+  refresh(data.objective_id);
+};
+</script>
+</body>
+</html>
+'''
+
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="BabyAGI web UI")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=2, help='Objectives run at once')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent tasks per objective')
+    parser.add_argument('--dag', action='store_true', help='Run objectives as dependency graphs')
+    args = parser.parse_args()
+    service = AgentService(AgentRuntime(load_config(), batching=True), concurrency=args.concurrency,
+                           workers=args.workers, dag=args.dag)
+    app.run(host=args.host, port=args.port, threaded=True)